@@ -0,0 +1,66 @@
+"""
+Repeated CollectionService.load calls with and without CachingStorage.
+
+Run from the project root:
+    python -m benchmarks.bench_caching
+    python -m benchmarks.bench_caching --items 100000 --loads 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from domain import Collection, Item
+from services import CollectionService
+from storage.base import Storage
+from storage.caching import CachingStorage
+from storage.json_storage import JsonStorage
+from storage.sqlite_storage import SQLiteStorage
+
+
+def make_collection(size: int) -> Collection:
+    items = [
+        Item(id=uuid4(), name=f"Item {n}", category=f"Category {n % 50}", quantity=1 + n % 7)
+        for n in range(size)
+    ]
+    return Collection(name="Bench", items=items)
+
+
+def run(storage: Storage, loads: int) -> float:
+    service = CollectionService(storage)
+
+    start = time.perf_counter()
+    for _ in range(loads):
+        service.load("Bench")
+    return (time.perf_counter() - start) / loads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--loads", type=int, default=20)
+    args = parser.parse_args()
+
+    collection = make_collection(args.items)
+    print(f"{'backend':>8} {'plain ms/load':>14} {'cached ms/load':>15} {'speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends: list[tuple[str, Storage]] = [
+            ("json", JsonStorage(Path(tmp) / "json")),
+            ("sqlite", SQLiteStorage(Path(tmp) / "bench.db")),
+        ]
+        for label, storage in backends:
+            storage.save_collection(collection)
+            plain = run(storage, args.loads)
+            cached = run(CachingStorage(storage), args.loads)
+            print(
+                f"{label:>8} {plain * 1000:>14.1f} {cached * 1000:>15.1f} {plain / cached:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+File size vs save/load time of JsonStorage with each compression setting.
+
+The synthetic collection repeats a handful of categories and key names the
+way real collections do. Run from the project root:
+    python -m benchmarks.bench_json_compression
+    python -m benchmarks.bench_json_compression --items 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from domain import Collection, Item
+from storage.json_storage import JsonStorage
+
+SETTINGS: list[tuple[str | None, int | None]] = [
+    (None, None),
+    ("zlib", 1),
+    ("zlib", 6),
+    ("gzip", 1),
+    ("gzip", 6),
+    ("gzip", 9),
+    ("lzma", 0),
+    ("lzma", 6),
+]
+
+
+def make_collection(size: int) -> Collection:
+    items = [
+        Item(id=uuid4(), name=f"Item {n}", category=f"Category {n % 50}", quantity=1 + n % 7)
+        for n in range(size)
+    ]
+    return Collection(name="Bench", items=items)
+
+
+def run(
+    compression: str | None, level: int | None, collection: Collection, workdir: Path
+) -> tuple[int, float, float]:
+    data_dir = workdir / f"{compression}-{level}"
+    # no fsync: this measures encoding/compression CPU, not the disk
+    storage = JsonStorage(
+        data_dir, durability="none", compression=compression, compression_level=level
+    )
+
+    start = time.perf_counter()
+    storage.save_collection(collection)
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    storage.load_collection("bench")
+    load = time.perf_counter() - start
+
+    return (data_dir / "bench.json").stat().st_size, save, load
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    collection = make_collection(args.items)
+    print(f"{'compression':>12} {'size MiB':>9} {'ratio':>6} {'save s':>7} {'load s':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for compression, level in SETTINGS:
+            size, save, load = run(compression, level, collection, Path(tmp))
+            baseline = baseline or size
+            label = "none" if compression is None else f"{compression}:{level}"
+            print(
+                f"{label:>12} {size / 2**20:>9.1f} {baseline / size:>6.1f}"
+                f" {save:>7.2f} {load:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
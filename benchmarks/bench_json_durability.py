@@ -0,0 +1,64 @@
+"""
+Saves per second of JsonStorage at each durability level, rewriting the
+whole file and with the journal.
+
+Run from the project root:
+    python -m benchmarks.bench_json_durability
+    python -m benchmarks.bench_json_durability --items 20000 --saves 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from domain import Collection, Item
+from services import CollectionService
+from storage.json_storage import DURABILITY_LEVELS, JsonStorage
+
+
+def make_collection(size: int) -> Collection:
+    items = [
+        Item(id=uuid4(), name=f"Item {n}", category=f"Category {n % 50}", quantity=1 + n % 7)
+        for n in range(size)
+    ]
+    return Collection(name="Bench", items=items)
+
+
+def run(durability: str, journal: bool, size: int, saves: int, workdir: Path) -> float:
+    data_dir = workdir / f"{durability}-{journal}"
+
+    with JsonStorage(data_dir, journal=journal, durability=durability) as storage:
+        service = CollectionService(storage)
+        storage.save_collection(make_collection(size))
+        collection = storage.load_collection("bench")
+
+        # one small edit per save, flushed at the end so group commit pays in full
+        start = time.perf_counter()
+        for n in range(saves):
+            service.add_item(collection, f"Item {n}", f"Category {n % 50}", 1)
+            service.save(collection)
+        storage.flush()
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--saves", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'durability':>10} {'rewrite saves/s':>16} {'journal saves/s':>16}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for durability in DURABILITY_LEVELS:
+            rewrite = run(durability, False, args.items, args.saves, Path(tmp))
+            journal = run(durability, True, args.items, args.saves, Path(tmp))
+            print(f"{durability:>10} {args.saves / rewrite:>16,.0f} {args.saves / journal:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare trigram-indexed search against the old linear scan.
+
+Run from the project root:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --sizes 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from uuid import uuid4
+
+from domain import Collection, Item
+
+WORDS = [
+    "padron", "fuente", "oliva", "opus", "anniversary", "maduro", "claro", "robusto",
+    "toro", "churchill", "lancero", "corona", "oolong", "sencha", "matcha", "puerh",
+]  # fmt: skip
+
+QUERIES = ["padron", "opus x", "robusto 12", "matcha", "zzz", "o"]
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
+
+
+def make_collection(size: int, seed: int = 0) -> Collection:
+    rng = random.Random(seed)
+    items = [
+        Item(
+            id=uuid4(),
+            name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {n}",
+            category=rng.choice(("Cigar", "Tea")),
+            quantity=1,
+        )
+        for n in range(size)
+    ]
+    return Collection(name=f"bench-{size}", items=items)
+
+
+def linear_search(collection: Collection, keyword: str) -> list[Item]:
+    key = _norm(keyword)
+    return [i for i in collection.items if key in _norm(i.name)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'query':>12} {'linear ms':>10} {'indexed ms':>11} {'speedup':>8}")
+
+    for size in args.sizes:
+        collection = make_collection(size)
+
+        start = time.perf_counter()
+        collection.search("warmup")
+        build = time.perf_counter() - start
+        print(f"{size:>10} {'(build)':>12} {'':>10} {build * 1000:>11.1f}")
+
+        for query in QUERIES:
+            key = _norm(query)
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                expected = linear_search(collection, query)
+            linear = (time.perf_counter() - start) / args.repeat
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                result = collection.search(key)
+            indexed = (time.perf_counter() - start) / args.repeat
+
+            assert result == expected
+            print(
+                f"{size:>10} {query!r:>12} {linear * 1000:>10.2f} {indexed * 1000:>11.2f}"
+                f" {linear / indexed:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
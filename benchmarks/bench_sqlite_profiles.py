@@ -0,0 +1,70 @@
+"""
+Save/load throughput of SQLiteStorage under each PROFILES entry.
+
+Run from the project root:
+    python -m benchmarks.bench_sqlite_profiles
+    python -m benchmarks.bench_sqlite_profiles --items 200000 --edits 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from domain import Collection, Item
+from services import CollectionService
+from storage.sqlite_storage import PROFILES, SQLiteStorage
+
+
+def make_collection(size: int) -> Collection:
+    items = [
+        Item(id=uuid4(), name=f"Item {n}", category=f"Category {n % 50}", quantity=1 + n % 7)
+        for n in range(size)
+    ]
+    return Collection(name="Bench", items=items)
+
+
+def run(profile: str, size: int, edits: int, workdir: Path) -> tuple[float, float, float]:
+    with SQLiteStorage(workdir / f"{profile}.db", profile=profile) as storage:
+        service = CollectionService(storage)
+
+        start = time.perf_counter()
+        storage.save_collection(make_collection(size))
+        full_save = time.perf_counter() - start
+
+        start = time.perf_counter()
+        collection = storage.load_collection("bench")
+        load = time.perf_counter() - start
+
+        # many small commits: where synchronous/journal_mode matter most
+        start = time.perf_counter()
+        for n in range(edits):
+            service.add_item(collection, f"Item {n}", f"Category {n % 50}", 1)
+            service.save(collection)
+        small_saves = time.perf_counter() - start
+
+    return full_save, load, small_saves
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'profile':>10} {'save items/s':>13} {'load items/s':>13} {'small saves/s':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PROFILES:
+            full_save, load, small_saves = run(profile, args.items, args.edits, Path(tmp))
+            print(
+                f"{profile:>10} {args.items / full_save:>13,.0f} {args.items / load:>13,.0f}"
+                f" {args.edits / small_saves:>14,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
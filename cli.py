@@ -1,51 +1,222 @@
 import argparse
+import sys
+from collections.abc import Callable, Iterable
+from itertools import islice
 from pathlib import Path
 
+from domain import Collection, Item
 from services import CollectionService
-from storage.base import Storage
-from storage.json_storage import JsonStorage
-from storage.sqlite_storage import SQLiteStorage
+from storage.base import CheckpointStorage, Storage
+from storage.binary_storage import BinaryStorage
+from storage.json_storage import DEFAULT_DURABILITY, DURABILITY_LEVELS, JsonStorage
+from storage.json_stream import COMPRESSIONS
+from storage.migrate import (
+    DEFAULT_JOBS,
+    MigrationProgress,
+    migrate_collections,
+    plan_migration,
+)
+from storage.sqlite_storage import DEFAULT_PROFILE, PROFILES, SQLiteStorage
+from storage.sync import plan_sync, sync_collections
+
+BACKENDS = ("json", "sqlite", "binary")
+
+
+def make_storage(
+    backend: str,
+    db: str,
+    json_dir: str | None = None,
+    sqlite_profile: str = DEFAULT_PROFILE,
+    json_journal: bool = False,
+    json_durability: str = DEFAULT_DURABILITY,
+    binary_dir: str | None = None,
+    json_compression: str | None = None,
+    json_compression_level: int | None = None,
+) -> Storage:
+    if backend == "sqlite":
+        return SQLiteStorage(Path(db), profile=sqlite_profile)
+
+    if backend == "binary":
+        return BinaryStorage(None if binary_dir is None else Path(binary_dir))
+
+    data_dir = None if json_dir is None else Path(json_dir)
+    return JsonStorage(
+        data_dir,
+        journal=json_journal,
+        durability=json_durability,
+        compression=json_compression,
+        compression_level=json_compression_level,
+    )
 
 
-def _norm(s: str) -> str:
-    return s.strip().casefold()
+def input_item_name(prompt: str, complete: Callable[[str], list[str]]) -> str:
+    """input() with tab completion of item names, where readline is available."""
+    try:
+        import readline
+    except ImportError:  # not shipped on every platform (e.g. Windows)
+        return input(prompt)
+
+    matches: list[str] = []
+
+    def completer(text: str, state: int) -> str | None:
+        nonlocal matches
+        if state == 0:
+            matches = complete(text)
+        return matches[state] if state < len(matches) else None
+
+    previous = readline.get_completer()
+    delims = readline.get_completer_delims()
+
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+    # complete the whole line; item names contain spaces
+    readline.set_completer_delims("")
+    readline.set_completer(completer)
+    try:
+        return input(prompt)
+    finally:
+        readline.set_completer(previous)
+        readline.set_completer_delims(delims)
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def compression_level(value: str) -> int:
+    """argparse type for compression levels, 0-9."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if not 0 <= number <= 9:
+        raise argparse.ArgumentTypeError(f"must be 0-9, got {number}")
+    return number
+
+
+def format_progress(progress: MigrationProgress) -> str:
+    eta = progress.eta
+    return (
+        f"{progress.collections}/{progress.total} collection(s), "
+        f"{progress.items} item(s) | "
+        f"{progress.rate(progress.collections):.1f} coll/s, "
+        f"{progress.rate(progress.items):.0f} items/s, "
+        f"{progress.rate(progress.bytes) / 1024:.0f} KiB/s | "
+        f"ETA {'?' if eta is None else f'{eta:.0f}s'}"
+    )
 
 
-def make_storage(backend: str, db: str, json_dir: str | None = None) -> Storage:
-    if backend == "sqlite":
-        return SQLiteStorage(Path(db))
+def report_progress(progress: MigrationProgress) -> None:
+    """One status line on stderr, redrawn in place on a terminal."""
+    end = "\r" if sys.stderr.isatty() else "\n"
+    print(format_progress(progress), end=end, file=sys.stderr, flush=True)
+
 
-    if json_dir is None:
-        return JsonStorage()
-    return JsonStorage(Path(json_dir))
+PAGE_SIZE = 20
+
+
+def print_items_paged(items: Iterable[Item], page_size: int = PAGE_SIZE) -> None:
+    """Print items a page at a time; only the pages actually shown are pulled."""
+    iterator = iter(items)
+    shown = 0
+
+    while True:
+        page = list(islice(iterator, page_size))
+        for item in page:
+            print(f"- {item.name} [{item.category}] x{item.quantity}")
+        shown += len(page)
+
+        if len(page) < page_size:
+            break
+        if input("-- Enter for more, q to stop -- ").strip().casefold() == "q":
+            break
+
+    if not shown:
+        print("No items.")
+    print()
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--backend", choices=BACKENDS, default="json")
     parser.add_argument("--db", default="curation.db")
+    parser.add_argument(
+        "--sqlite-profile",
+        choices=tuple(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="SQLite durability/speed trade-off (see PROFILES in storage/sqlite_storage.py)",
+    )
+    parser.add_argument(
+        "--json-journal",
+        action="store_true",
+        help="JSON only: append changes to a per-collection log instead of rewriting the file",
+    )
+    parser.add_argument(
+        "--json-durability",
+        choices=DURABILITY_LEVELS,
+        default=DEFAULT_DURABILITY,
+        help=(
+            "JSON only: fsync policy (see DURABILITY_LEVELS in storage/json_storage.py); "
+            "'group' requires --json-journal"
+        ),
+    )
+    parser.add_argument(
+        "--json-compression",
+        choices=COMPRESSIONS,
+        default=None,
+        help="JSON only: compress files on save (reading detects the format)",
+    )
+    parser.add_argument(
+        "--json-compression-level",
+        type=compression_level,
+        default=None,
+        help="Compression level (0-9; default 6); requires --json-compression",
+    )
     parser.add_argument(
         "--migrate",
         action="store_true",
         help="Migrate collections from one backend to another and exit",
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help=(
+            "Bring the destination backend up to date with the source, "
+            "copying only collections (and items) that differ, and exit"
+        ),
+    )
     parser.add_argument(
         "--from-backend",
-        choices=("json", "sqlite"),
+        choices=BACKENDS,
         default="json",
-        help="Source backend for migration",
+        help="Source backend for migration/sync",
     )
     parser.add_argument(
         "--to-backend",
-        choices=("json", "sqlite"),
+        choices=BACKENDS,
         default="sqlite",
-        help="Destination backend for migration",
+        help="Destination backend for migration/sync",
     )
     parser.add_argument(
         "--json-dir",
         default=None,
         help="Directory for JSON storage (defaults to ~/.curation)",
     )
+    parser.add_argument(
+        "--binary-dir",
+        default=None,
+        help="Directory for binary storage (defaults to ~/.curation)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -57,55 +228,124 @@ def main() -> None:
         default=None,
         help="Migrate only these collection names (repeatable). Example: --only cigars --only tea",
     )
+    parser.add_argument(
+        "--jobs",
+        type=positive_int,
+        default=DEFAULT_JOBS,
+        help="Migration: collections loaded from the source in parallel",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Migration: continue an interrupted run; collections the destination "
+            "checkpointed with unchanged content are not copied again"
+        ),
+    )
     parser.add_argument(
         "--overwrite",
         action="store_true",
         help="Overwrite destination collections if they already exist",
     )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Don't load the collection up front; view/summary/search read from storage",
+    )
+    parser.add_argument(
+        "--write-through",
+        action="store_true",
+        help="Persist every edit immediately as a single-item write",
+    )
     args = parser.parse_args()
-
-    if args.migrate:
+    if args.json_durability == "group" and not args.json_journal:
+        # rewrites fsync each snapshot before its rename; only appends coalesce
+        parser.error("--json-durability group requires --json-journal")
+    if args.json_compression_level is not None and args.json_compression is None:
+        parser.error("--json-compression-level requires --json-compression")
+
+    def storage_for(backend: str) -> Storage:
+        return make_storage(
+            backend,
+            args.db,
+            args.json_dir,
+            sqlite_profile=args.sqlite_profile,
+            json_journal=args.json_journal,
+            json_durability=args.json_durability,
+            binary_dir=args.binary_dir,
+            json_compression=args.json_compression,
+            json_compression_level=args.json_compression_level,
+        )
+
+    if args.sync:
         if args.from_backend == args.to_backend:
-            print("Source and destination backends are the same name.\nNothing to migrate...")
+            print("Source and destination backends are the same name.\nNothing to sync...")
             return
 
-        source = make_storage(args.from_backend, args.db, args.json_dir)
-        destination = make_storage(args.to_backend, args.db, args.json_dir)
-
-        source_names = list(source.list_collections())
-        source_existing: set[str] = {_norm(name) for name in source_names}
-        destination_existing: set[str] = {_norm(name) for name in destination.list_collections()}
-
-        requested_names = args.only if args.only else source_names
+        source = storage_for(args.from_backend)
+        destination = storage_for(args.to_backend)
 
-        migrated = 0
-        skipped = 0
-        missing = 0
-        missing_names: list[str] = []
-        will_migrate: list[str] = []
-        seen: set[str] = set()
-
-        for name in requested_names:
-            key = _norm(name)
-            if key in seen:
-                continue
-            seen.add(key)
-
-            if key not in source_existing:
-                missing += 1
-                missing_names.append(name)
-                continue
+        requested = plan_migration(
+            source.list_collections(), (), requested=args.only, overwrite=True
+        )
+        differing = plan_sync(source, destination, requested.migrate, jobs=args.jobs)
 
-            if key in destination_existing and not args.overwrite:
-                skipped += 1
-                continue
+        if args.dry_run:
+            print(
+                f"Would sync {len(differing.changed)} collection(s): "
+                + ", ".join(differing.changed)
+            )
+        else:
+            result = sync_collections(source, destination, differing.changed)
+            print(
+                f"Synced {result.collections} collection(s): {result.upserted} item(s) "
+                f"written, {result.deleted} removed."
+            )
+        print(f"Unchanged {len(differing.unchanged)}. Missing {len(requested.missing)}.")
+
+        if requested.missing:
+            print("Missing (not found in source): " + ", ".join(requested.missing))
+        return
 
-            migrated += 1
-            will_migrate.append(name)
+    if args.migrate:
+        if args.from_backend == args.to_backend:
+            print("Source and destination backends are the same name.\nNothing to migrate...")
+            return
 
-            if not args.dry_run:
-                destination.save_collection(source.load_collection(name))
-                destination_existing.add(key)
+        source = storage_for(args.from_backend)
+        destination = storage_for(args.to_backend)
+
+        checkpointed: Iterable[str] = ()
+        if args.resume and isinstance(destination, CheckpointStorage):
+            # a resumed run revisits what it wrote; checkpoints decide what to skip
+            checkpointed = destination.load_checkpoints()
+        plan = plan_migration(
+            source.list_collections(),
+            destination.list_collections(),
+            requested=args.only,
+            overwrite=args.overwrite,
+            checkpointed=checkpointed,
+        )
+        will_migrate = plan.migrate
+        migrated = len(will_migrate)
+        skipped = plan.skipped
+        missing = len(plan.missing)
+        missing_names = plan.missing
+
+        if not args.dry_run:
+            written = migrate_collections(
+                source,
+                destination,
+                will_migrate,
+                jobs=args.jobs,
+                resume=args.resume,
+                progress=report_progress,
+            )
+            if will_migrate and sys.stderr.isatty():
+                print(file=sys.stderr)
+            if args.resume:
+                print(f"Resumed: {migrated - written} collection(s) already complete.")
+                migrated = written
 
         if args.dry_run:
             joined = ", ".join(will_migrate)
@@ -123,17 +363,38 @@ def main() -> None:
             print("Missing (not found in source): " + ", ".join(missing_names))
         return
 
-    storage: Storage = make_storage(args.backend, args.db, args.json_dir)
+    storage = storage_for(args.backend)
 
-    service = CollectionService(storage)
+    service = CollectionService(storage, write_through=args.write_through)
 
     name = input("Enter collection name: ").strip()
     while not name:
         print("Name cannot be blank.")
         name = input("Enter collection name: ").strip()
 
-    collection = service.load(name)
-    print(f"Loaded collection '{name}' with {len(collection.items)} items.\n")
+    collection_name = name
+    collection: Collection | None = None
+
+    if args.lazy:
+        print(f"Opened collection '{name}'. Items load on the first edit.\n")
+    else:
+        collection = service.load(name)
+        print(f"Loaded collection '{name}' with {len(collection.items)} items.\n")
+
+    def loaded() -> Collection:
+        nonlocal collection
+        if collection is None:
+            collection = service.load(collection_name)
+        return collection
+
+    def current() -> Collection | str:
+        # read-only options work on the name until something forces a load
+        return collection if collection is not None else collection_name
+
+    def complete_item_name(prefix: str) -> list[str]:
+        if collection is None:
+            return []
+        return [item.name for item in service.complete(collection, prefix, limit=20)]
 
     while True:
         print("=== Curation ===")
@@ -148,7 +409,7 @@ def main() -> None:
         choice = input("Select an option (1-7): ").strip()
 
         if choice == "1":
-            item_name = input("Enter new item name: ").strip()
+            item_name = input_item_name("Enter new item name: ", complete_item_name).strip()
             category = input("Enter item category: ").strip()
             quant = input("Quantity to add: ").strip()
 
@@ -157,25 +418,25 @@ def main() -> None:
             except ValueError:
                 print("Quantity must be an integer.")
                 continue
-            collection = service.add_item(collection, item_name, category, qty)
+            collection = service.add_item(loaded(), item_name, category, qty)
             print(f"Added '{item_name}' x{qty}.\n")
 
         elif choice == "2":
-            name = input("Enter item name to remove: ")
+            name = input_item_name("Enter item name to remove: ", complete_item_name)
             category = input("Enter item category: ")
             quantity_str = input("Quantity to remove: ")
             quantity = int(quantity_str)
 
-            service.remove_item(collection, name, category, quantity)
+            service.remove_item(loaded(), name, category, quantity)
             print(f"Removed '{name}' x{quantity}.")
 
         elif choice == "3":
-            name = input("Enter item name: ")
+            name = input_item_name("Enter item name: ", complete_item_name)
             category = input("Enter item category: ")
             quantity_str = input("New quantity (0 deletes item from collection): ")
             quantity = int(quantity_str)
 
-            outcome = service.set_quantity(collection, name, category, quantity)
+            outcome = service.set_quantity(loaded(), name, category, quantity)
 
             if outcome == "not_found":
                 print("Item not found or invalid input. No changes made.")
@@ -185,15 +446,10 @@ def main() -> None:
                 print(f"Deleted '{name}' [{category}].")
 
         elif choice == "4":
-            if not collection.items:
-                print("No items.\n")
-                continue
-            for item in collection.items:
-                print(f"- {item.name} [{item.category}] x{item.quantity}")
-            print()
+            print_items_paged(service.iter_items(current(), page_size=PAGE_SIZE))
 
         elif choice == "5":
-            summary = service.summary_by_category(collection)
+            summary = service.summary_by_category(current())
             if not summary:
                 print("No items.\n")
                 continue
@@ -203,7 +459,7 @@ def main() -> None:
 
         elif choice == "6":
             keyword = input("Search keyword: ").strip()
-            results = service.search(collection, keyword)
+            results = service.search(current(), keyword)
 
             if not results:
                 print("No matches.\n")
@@ -213,11 +469,13 @@ def main() -> None:
             print()
 
         elif choice == "7":
-            service.save(collection)
+            if collection is not None:
+                service.save(collection)
             print("Saved.\n")
 
         elif choice == "8":
-            service.save(collection)
+            if collection is not None:
+                service.save(collection)
             print("Saved. Good Bye...")
             return
 
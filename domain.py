@@ -1,19 +1,511 @@
-from dataclasses import dataclass, field
+import copy
+import heapq
+import weakref
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, MutableSequence
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, overload
 from uuid import UUID
 
+from indexes import BKTree, PrefixTrie, TrigramIndex, levenshtein
 
-@dataclass
+ItemKey = tuple[str, str]
+
+
+# bumped by every assignment to a field of an existing Item; a Collection
+# compares it with the value it last saw to tell whether its totals and
+# indexes may be stale
+_field_edits = 0
+
+
+@dataclass(init=False)
 class Item:
     id: UUID
     name: str
     category: str
     quantity: int
-    created_at: datetime = field(default_factory=datetime.utcnow)
-    updated_at: datetime | None = None
+    created_at: datetime
+    updated_at: datetime | None
+
+    def __init__(
+        self,
+        id: UUID,
+        name: str,
+        category: str,
+        quantity: int,
+        created_at: datetime | None = None,
+        updated_at: datetime | None = None,
+    ) -> None:
+        # construction is not an edit: skip __setattr__
+        self.__dict__.update(
+            id=id,
+            name=name,
+            category=category,
+            quantity=quantity,
+            created_at=datetime.utcnow() if created_at is None else created_at,
+            updated_at=updated_at,
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        global _field_edits
+        _field_edits += 1
+        object.__setattr__(self, name, value)
+
+
+@dataclass
+class ChangeSet:
+    """Item-level delta since a collection was last loaded from/saved to a storage."""
+
+    upserts: list[Item]
+    deletes: list[ItemKey]
+
+
+class CollectionItems(MutableSequence[Item]):
+    """
+    Live view of a Collection's items, in insertion order.
+
+    Edits made through it go through the collection like append/remove do.
+    Iteration, len(), append(), remove() and pop() are cheap; indexing and
+    positional edits (items[i] = x, insert, del items[i]) are O(n).
+    """
+
+    def __init__(self, collection: "Collection") -> None:
+        self._collection = collection
+
+    def __len__(self) -> int:
+        return len(self._collection._store)
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._collection._store.values())
+
+    def __contains__(self, value: object) -> bool:
+        return any(item == value for item in self)
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Item]: ...
+
+    def __getitem__(self, index: int | slice) -> Item | list[Item]:
+        return self._collection._ordered()[index]
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        items = list(self)
+        items[index] = value
+        self._collection._rearrange(items)
+
+    def __delitem__(self, index: int | slice) -> None:
+        items = list(self)
+        del items[index]
+        self._collection._rearrange(items)
+
+    def insert(self, index: int, value: Item) -> None:
+        items = list(self)
+        items.insert(index, value)
+        self._collection._rearrange(items)
+
+    def append(self, value: Item) -> None:
+        self._collection.append(value)
+
+    def remove(self, value: Item) -> None:
+        self._collection.remove(value)
+
+    def pop(self, index: int = -1) -> Item:
+        item = self[index]
+        self._collection.remove(item)
+        return item
+
+    def clear(self) -> None:
+        self._collection._rearrange([])
+
+    def reverse(self) -> None:
+        self._collection._rearrange(list(reversed(self)))
+
+    def sort(self, *, key: Any = None, reverse: bool = False) -> None:
+        self._collection._rearrange(sorted(self, key=key, reverse=reverse))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CollectionItems | list):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> list[Item]:
+        # a detached list, e.g. for dataclasses.asdict()
+        return copy.deepcopy(list(self), memo)
+
+
+class _ItemsField:
+    """
+    Collection.items: reads give the live CollectionItems view, assigning
+    any iterable replaces the items (a descriptor-typed dataclass field).
+    """
+
+    @overload
+    def __get__(self, obj: None, objtype: Any = None) -> tuple[Item, ...]: ...
+
+    @overload
+    def __get__(self, obj: "Collection", objtype: Any = None) -> CollectionItems: ...
+
+    def __get__(
+        self, obj: "Collection | None", objtype: Any = None
+    ) -> CollectionItems | tuple[Item, ...]:
+        if obj is None:
+            return ()  # the dataclass default
+        return obj._view
+
+    def __set__(self, obj: "Collection", value: Iterable[Item]) -> None:
+        obj._replace(value)
 
 
 @dataclass
 class Collection:
     name: str
-    items: list[Item] = field(default_factory=list)
+    items: _ItemsField = _ItemsField()
+
+    # Everything below 'items' is derived state kept in plain attributes, not
+    # dataclass fields: __eq__/__repr__/asdict() and pickling only see the
+    # name and the items.
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"name": self.name, "items": list(self._store.values())}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.name = state["name"]
+        self.items = state["items"]
+
+    def _replace(self, items: Iterable[Item]) -> None:
+        if "_view" not in self.__dict__:
+            self._view = CollectionItems(self)
+
+        # the store: insertion slot -> item, so removal is O(1) and keeps
+        # order; slot numbers also order index hits the way 'items' does
+        self._store: dict[int, Item] = dict(enumerate(items))  # may be our own view
+        self._next = len(self._store)
+        self._list: list[Item] | None = None
+        self._edits_seen = _field_edits
+
+        # normalized key -> slot (the last item with that key, should
+        # several share it)
+        self._slots: dict[ItemKey, int] = {}
+
+        # category (display form, as summary_by_category reports it) ->
+        # running quantity total and number of items contributing to it
+        self._category_totals: dict[str, int] = {}
+        self._category_sizes: dict[str, int] = {}
+
+        # built on first search/complete, then kept current by append/remove
+        self._trigrams: TrigramIndex[ItemKey] | None = None
+        self._prefixes: PrefixTrie[ItemKey] | None = None
+        self._names: BKTree[ItemKey] | None = None
+
+        # the storage that last loaded/saved us (weakly held) and the name it
+        # knows us by, plus the keys upserted/deleted since then
+        self._baseline: tuple[Callable[[], object], str] | None = None
+        self._dirty: set[ItemKey] = set()
+        self._deleted: set[ItemKey] = set()
+
+        self._reindex()
+
+    def copy(self) -> "Collection":
+        """
+        Same name, fresh Items with the same field values (see copy_items).
+
+        The key index and totals are copied rather than recomputed; the copy
+        is not clean for any storage.
+        """
+        self._sync()
+        copied = Collection(name=self.name)
+        copied._store = dict(zip(self._store, copy_items(self._store.values()), strict=True))
+        copied._next = self._next
+        copied._slots = dict(self._slots)
+        copied._category_totals = dict(self._category_totals)
+        copied._category_sizes = dict(self._category_sizes)
+        return copied
+
+    def find(self, name_norm: str, category_norm: str) -> Item | None:
+        """Return the item with the given normalized key, or None."""
+        self._sync()
+        slot = self._slots.get((name_norm, category_norm))
+        return None if slot is None else self._store[slot]
+
+    def append(self, item: Item) -> None:
+        self._sync()
+        key = item_key(item)
+        self._store[self._next] = item
+        self._slots[key] = self._next
+        self._next += 1
+        self._list = None
+        self._count(item.category, item.quantity, 1)
+        self._index_add(key)
+        self._dirty.add(key)
+
+    def remove(self, item: Item) -> None:
+        """Remove 'item' in constant time, keeping the order of the rest."""
+        self._sync()
+        key = item_key(item)
+        slot = self._slots.get(key)
+
+        if slot is None or self._store[slot] is not item or self._has_duplicates():
+            # duplicate keys or an item not tracked by the index
+            found = next((s for s, held in self._store.items() if held is item), None)
+            if found is None:
+                raise ValueError(f"{item!r} is not in collection {self.name!r}")
+            del self._store[found]
+            self._reindex()
+            self._deleted.add(key)
+            if key in self._slots:
+                self._dirty.add(key)  # another item still has that key
+            return
+
+        del self._store[slot]
+        del self._slots[key]
+        self._list = None
+        self._count(item.category, -item.quantity, -1)
+        self._index_discard(key)
+        self._deleted.add(key)
+        self._dirty.discard(key)
+
+    def update_quantity(self, item: Item, quantity: int, updated_at: datetime) -> None:
+        """Set the quantity of an item already in the collection."""
+        self._sync()
+        self._count(item.category, quantity - item.quantity, 0)
+        item.__dict__.update(quantity=quantity, updated_at=updated_at)
+        self._dirty.add(item_key(item))
+
+    def mark_clean(self, storage: object) -> None:
+        """Record that 'storage' now holds exactly this collection."""
+        self._sync()
+        self._baseline = (_ref(storage), self.name)
+        self._dirty = set()
+        self._deleted = set()
+
+    def mark_item_clean(self, storage: object, key: ItemKey) -> None:
+        """Record that 'storage' already holds the current state of one item."""
+        if self._baseline is not None and self._baseline[0]() is storage:
+            self._dirty.discard(key)
+            self._deleted.discard(key)
+
+    def changes_since_clean(self, storage: object) -> ChangeSet | None:
+        """
+        Items changed since the last mark_clean(storage), or None when no
+        delta is known (never loaded from 'storage', renamed, duplicate item
+        keys, or Item fields / item positions edited directly) and a full save
+        is required.
+
+        Deleted keys should be applied before upserts; a key can appear in
+        both when an item was removed and added again.
+        """
+        self._sync()
+        if self._baseline is None:
+            return None
+
+        owner, name = self._baseline
+        if owner() is not storage or name != self.name or self._has_duplicates():
+            return None
+
+        upserts = sorted(self._slots[key] for key in self._dirty if key in self._slots)
+        return ChangeSet(
+            upserts=[self._store[slot] for slot in upserts], deletes=sorted(self._deleted)
+        )
+
+    def search(self, needle: str) -> list[Item]:
+        """
+        Items whose normalized name contains the normalized 'needle'.
+
+        Same result and order as scanning 'items', but only trigram candidates
+        are checked once the index has been built.
+        """
+        self._sync()
+        if self._has_duplicates():
+            # duplicate keys: the index cannot represent every item
+            return [i for i in self.items if needle in _norm(i.name)]
+
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex()
+            for key in self._slots:
+                self._trigrams.add(key, key[0])
+
+        candidates = self._trigrams.candidates(needle)
+        keys = self._slots if candidates is None else candidates
+        hits = sorted(self._slots[key] for key in keys if needle in key[0])
+        return [self._store[slot] for slot in hits]
+
+    def complete(self, prefix: str, limit: int) -> list[Item]:
+        """
+        Up to 'limit' items whose normalized name starts with 'prefix'.
+
+        Ranked by quantity (highest first), ties broken by normalized key.
+        """
+        self._sync()
+        if self._has_duplicates():
+            keyed = [(item_key(i), i) for i in self.items if _norm(i.name).startswith(prefix)]
+            best = heapq.nsmallest(limit, keyed, key=lambda ki: (-ki[1].quantity, ki[0]))
+            return [item for _, item in best]
+
+        if self._prefixes is None:
+            self._prefixes = PrefixTrie()
+            for key in self._slots:
+                self._prefixes.add(key, key[0])
+
+        keys = heapq.nsmallest(
+            limit,
+            self._prefixes.keys_with_prefix(prefix),
+            key=lambda k: (-self._store[self._slots[k]].quantity, k),
+        )
+        return [self._store[self._slots[key]] for key in keys]
+
+    def fuzzy_search(self, needle: str, max_distance: int) -> list[Item]:
+        """
+        Items whose normalized name is within 'max_distance' edits of 'needle'.
+
+        Closest first; equal distances keep item order.
+        """
+        self._sync()
+        if self._has_duplicates():
+            items = list(self.items)
+            scored = [(levenshtein(needle, _norm(i.name)), pos) for pos, i in enumerate(items)]
+            return [items[pos] for d, pos in sorted(scored) if d <= max_distance]
+
+        if self._names is None or self._names.stale:
+            self._names = BKTree()
+            for key in self._slots:
+                self._names.add(key, key[0])
+
+        hits = sorted(
+            (distance, self._slots[key])
+            for distance, key in self._names.search(needle, max_distance)
+        )
+        return [self._store[slot] for _, slot in hits]
+
+    def category_totals(self) -> dict[str, int]:
+        """Running quantity totals per category, O(#categories) to read."""
+        self._sync()
+        return dict(self._category_totals)
+
+    def is_consistent(self) -> bool:
+        """
+        Compare the incrementally maintained state against a full recompute.
+
+        Meant for tests and debugging; this is O(n).
+        """
+        self._sync()
+        slots = {item_key(item): slot for slot, item in self._store.items()}
+        totals: Counter[str] = Counter()
+        for item in self._store.values():
+            totals[item.category] += item.quantity
+
+        if slots != self._slots or dict(totals) != self._category_totals:
+            return False
+
+        if self._trigrams is not None:
+            trigrams: TrigramIndex[ItemKey] = TrigramIndex()
+            for key in slots:
+                trigrams.add(key, key[0])
+            if trigrams != self._trigrams:
+                return False
+
+        if self._prefixes is not None:
+            if sorted(self._prefixes.keys_with_prefix("")) != sorted(slots):
+                return False
+
+        if self._names is not None:
+            if sorted(key for _, key in self._names.search("", 1 << 30)) != sorted(slots):
+                return False
+
+        return True
+
+    def _ordered(self) -> list[Item]:
+        # positional access for the view, cached until the next change
+        if self._list is None:
+            self._list = list(self._store.values())
+        return self._list
+
+    def _rearrange(self, items: list[Item]) -> None:
+        # positional edits made through the view: renumber the slots; item
+        # order is not part of a delta, so the next save is a full one
+        self._store = dict(enumerate(items))
+        self._next = len(items)
+        self._reindex()
+        self._baseline = None
+
+    def _sync(self) -> None:
+        # an Item field was assigned directly since we last looked (perhaps
+        # not one of ours): recompute everything derived from the fields, and
+        # save in full next time since we can't tell what changed
+        if self._edits_seen != _field_edits:
+            self._reindex()
+            self._baseline = None
+
+    def _has_duplicates(self) -> bool:
+        return len(self._slots) != len(self._store)
+
+    def _reindex(self) -> None:
+        self._slots = {item_key(item): slot for slot, item in self._store.items()}
+        self._list = None
+        self._edits_seen = _field_edits
+
+        self._category_totals = {}
+        self._category_sizes = {}
+        for item in self._store.values():
+            self._count(item.category, item.quantity, 1)
+
+        self._trigrams = None
+        self._prefixes = None
+        self._names = None
+
+    def _index_add(self, key: ItemKey) -> None:
+        if self._trigrams is not None:
+            self._trigrams.add(key, key[0])
+        if self._prefixes is not None:
+            self._prefixes.add(key, key[0])
+        if self._names is not None:
+            self._names.add(key, key[0])
+
+    def _index_discard(self, key: ItemKey) -> None:
+        if self._trigrams is not None:
+            self._trigrams.discard(key, key[0])
+        if self._prefixes is not None:
+            self._prefixes.discard(key, key[0])
+        if self._names is not None:
+            self._names.discard(key, key[0])
+
+    def _count(self, category: str, quantity: int, size: int) -> None:
+        remaining = self._category_sizes.get(category, 0) + size
+        if remaining <= 0:
+            self._category_totals.pop(category, None)
+            self._category_sizes.pop(category, None)
+            return
+        self._category_totals[category] = self._category_totals.get(category, 0) + quantity
+        self._category_sizes[category] = remaining
+
+
+def item_key(item: Item) -> ItemKey:
+    return (_norm(item.name), _norm(item.category))
+
+
+def copy_items(items: Iterable[Item]) -> list[Item]:
+    # Items are mutable; their field values (UUID, str, int, datetime) are not.
+    # Copies the field dict directly: neither __init__ nor an edit
+    copies: list[Item] = []
+    for item in items:
+        copied = object.__new__(Item)
+        copied.__dict__.update(item.__dict__)
+        copies.append(copied)
+    return copies
+
+
+def _ref(storage: object) -> Callable[[], object]:
+    # don't keep a storage alive just because one of its collections is
+    try:
+        return weakref.ref(storage)
+    except TypeError:
+        return lambda: storage
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
@@ -0,0 +1,215 @@
+"""
+Secondary in-memory indexes used by `domain.Collection`.
+
+Indexes map a piece of normalized text to opaque hashable keys; they know
+nothing about `Item`s, so the collection stays the single owner of items.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+TRIGRAM = 3
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i : i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class TrigramIndex(Generic[K]):
+    """
+    Inverted index from character trigrams to keys.
+
+    Any text containing a needle of length >= 3 must contain every trigram of
+    that needle, so intersecting the posting sets gives a superset of the
+    matches. Callers still verify each candidate with a real substring check.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, set[K]] = {}
+
+    def add(self, key: K, text: str) -> None:
+        for gram in trigrams(text):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def discard(self, key: K, text: str) -> None:
+        for gram in trigrams(text):
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            posting.discard(key)
+            if not posting:
+                del self._postings[gram]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TrigramIndex):
+            return NotImplemented
+        return self._postings == other._postings
+
+    def candidates(self, needle: str) -> set[K] | None:
+        """
+        Keys whose text may contain 'needle'.
+
+        Returns None when the needle is too short to use the index; the caller
+        has to scan instead.
+        """
+        grams = trigrams(needle)
+        if not grams:
+            return None
+
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+
+
+class _TrieNode(Generic[K]):
+    __slots__ = ("children", "keys")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode[K]] = {}
+        self.keys: set[K] = set()
+
+
+class PrefixTrie(Generic[K]):
+    """Character trie from text to keys, for prefix (type-ahead) lookups."""
+
+    def __init__(self) -> None:
+        self._root: _TrieNode[K] = _TrieNode()
+
+    def add(self, key: K, text: str) -> None:
+        node = self._root
+        for ch in text:
+            node = node.children.setdefault(ch, _TrieNode())
+        node.keys.add(key)
+
+    def discard(self, key: K, text: str) -> None:
+        path = [self._root]
+        for ch in text:
+            child = path[-1].children.get(ch)
+            if child is None:
+                return
+            path.append(child)
+
+        path[-1].keys.discard(key)
+
+        # prune branches that no longer lead to any key
+        for depth in range(len(text), 0, -1):
+            node = path[depth]
+            if node.keys or node.children:
+                break
+            del path[depth - 1].children[text[depth - 1]]
+
+    def keys_with_prefix(self, prefix: str) -> list[K]:
+        node = self._root
+        for ch in prefix:
+            child = node.children.get(ch)
+            if child is None:
+                return []
+            node = child
+
+        found: list[K] = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            found.extend(current.keys)
+            stack.extend(current.children.values())
+        return found
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (insert/delete/substitute, each cost 1)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class _BKNode(Generic[K]):
+    __slots__ = ("text", "keys", "children")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.keys: set[K] = set()
+        self.children: dict[int, _BKNode[K]] = {}
+
+
+class BKTree(Generic[K]):
+    """
+    Burkhard-Keller tree over text under edit distance.
+
+    Triangle inequality lets a query at distance d from a node skip every
+    child edge outside [d - max_distance, d + max_distance]. Removal only
+    empties a node's key set (the node keeps routing), so callers should
+    rebuild once 'stale' reports that empty nodes outnumber live ones.
+    """
+
+    def __init__(self) -> None:
+        self._root: _BKNode[K] | None = None
+        self._live = 0
+        self._empty = 0
+
+    @property
+    def stale(self) -> bool:
+        return self._empty > max(self._live, 64)
+
+    def add(self, key: K, text: str) -> None:
+        created = False
+        node: _BKNode[K]
+        if self._root is None:
+            self._root = node = _BKNode(text)
+            created = True
+        else:
+            node = self._root
+            while node.text != text:
+                distance = levenshtein(text, node.text)
+                child = node.children.get(distance)
+                if child is None:
+                    child = node.children[distance] = _BKNode(text)
+                    created = True
+                node = child
+
+        if not node.keys:
+            self._live += 1
+            if not created:
+                self._empty -= 1
+        node.keys.add(key)
+
+    def discard(self, key: K, text: str) -> None:
+        node = self._root
+        while node is not None and node.text != text:
+            node = node.children.get(levenshtein(text, node.text))
+
+        if node is None or key not in node.keys:
+            return
+
+        node.keys.discard(key)
+        if not node.keys:
+            self._live -= 1
+            self._empty += 1
+
+    def search(self, text: str, max_distance: int) -> list[tuple[int, K]]:
+        """(distance, key) for every key within 'max_distance' of 'text'."""
+        found: list[tuple[int, K]] = []
+        stack = [self._root] if self._root is not None else []
+
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(text, node.text)
+            if distance <= max_distance:
+                found.extend((distance, key) for key in node.keys)
+
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for edge, child in node.children.items() if low <= edge <= high)
+        return found
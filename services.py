@@ -1,18 +1,53 @@
-from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Literal
 from uuid import uuid4
 
-from domain import Collection, Item
-from storage.base import Storage
+from domain import Collection, Item, ItemKey
+from storage.base import (
+    ItemStorage,
+    SearchableStorage,
+    Storage,
+    StreamingStorage,
+    SummarizingStorage,
+)
 from storage.json_storage import JsonStorage
 
 RemoveOutcome = Literal["not_found", "decremented", "deleted"]
 SetQuantityOutcome = Literal["not_found", "set", "deleted"]
+AddOutcome = Literal["rejected", "created", "incremented"]
+BatchOutcome = AddOutcome | RemoveOutcome | SetQuantityOutcome
+
+
+@dataclass(frozen=True)
+class BatchOperation:
+    """
+    One edit for CollectionService.apply_batch.
+
+    'op' mirrors the single-item methods: "add" -> add_item,
+    "remove" -> remove_item, "set" -> set_quantity.
+    """
+
+    op: Literal["add", "remove", "set"]
+    name: str
+    category: str
+    quantity: int
+
+
+@dataclass
+class _PendingItem:
+    # state of one logical item while a batch is being folded
+    original: Item | None
+    quantity: int
+    name: str
+    category: str
+    replaced: bool = False
+    modified: bool = False
 
 
 class CollectionService:
-    def __init__(self, storage: Storage | None = None):
+    def __init__(self, storage: Storage | None = None, write_through: bool = False):
         """
         If 'storage' is not provided, default to JsonStorage.
 
@@ -20,8 +55,15 @@ class CollectionService:
             svc = CollectionServices()
         and in the CLI:
             svc = CollectionServices(JsonStorage())
+
+        With 'write_through', every add/remove/set is persisted right away
+        through the backend's item-level operations (when it has them), so
+        a single edit costs a single-row write instead of a full save.
         """
         self._storage = storage or JsonStorage()
+        self._item_storage = (
+            self._storage if write_through and isinstance(self._storage, ItemStorage) else None
+        )
 
     def load(self, name: str) -> Collection:
         name = _norm(name)
@@ -30,6 +72,18 @@ class CollectionService:
     def save(self, collection: Collection) -> None:
         self._storage.save_collection(collection)
 
+    def iter_items(self, collection: Collection | str, page_size: int = 500) -> Iterator[Item]:
+        """
+        Walk a collection's items. Given a name, streaming backends hand them
+        out a page at a time instead of loading the whole collection.
+        """
+        if isinstance(collection, str):
+            if isinstance(self._storage, StreamingStorage):
+                return self._storage.iter_items(collection, page_size)
+            collection = self.load(collection)
+
+        return iter(collection.items)
+
     def add_item(
         self, collection: Collection, name: str, category: str, quantity: int
     ) -> Collection:
@@ -42,22 +96,14 @@ class CollectionService:
         disp_name = _clean_display(name)
         disp_category = _clean_display(category)
 
-        existing = next(
-            (
-                i
-                for i in collection.items
-                if _norm(i.name) == norm_name and _norm(i.category) == norm_category
-            ),
-            None,
-        )
+        existing = collection.find(norm_name, norm_category)
 
         now = datetime.utcnow()
 
         if existing:
-            existing.quantity += quantity
-            existing.updated_at = now
+            collection.update_quantity(existing, existing.quantity + quantity, now)
         else:
-            collection.items.append(
+            collection.append(
                 Item(
                     id=uuid4(),
                     name=disp_name,
@@ -66,6 +112,7 @@ class CollectionService:
                     created_at=now,
                 )
             )
+        self._write_through(collection, (norm_name, norm_category))
         return collection
 
     def remove_item(
@@ -78,17 +125,10 @@ class CollectionService:
         norm_name = _norm(name)
         norm_category = _norm(category)
 
-        if not norm_name or not norm_name or quantity <= 0:
+        if not norm_name or not norm_category or quantity <= 0:
             return "not_found"
 
-        existing = next(
-            (
-                i
-                for i in collection.items
-                if _norm(i.name) == norm_name and _norm(i.category) == norm_category
-            ),
-            None,
-        )
+        existing = collection.find(norm_name, norm_category)
 
         if existing is None:
             return "not_found"
@@ -96,25 +136,59 @@ class CollectionService:
         now = datetime.utcnow()
 
         if existing.quantity > quantity:
-            existing.quantity -= quantity
-            existing.updated_at = now
+            collection.update_quantity(existing, existing.quantity - quantity, now)
+            self._write_through(collection, (norm_name, norm_category))
             return "decremented"
 
-        collection.items.remove(existing)
+        collection.remove(existing)
+        self._write_through(collection, (norm_name, norm_category))
         return "deleted"
 
-    def summary_by_category(self, collection: Collection) -> dict[str, int]:
-        counts: Counter[str] = Counter()
-        for item in collection.items:
-            counts[item.category] += item.quantity
-        return dict(counts)
+    def summary_by_category(self, collection: Collection | str) -> dict[str, int]:
+        """
+        'collection' may be a loaded Collection or a collection name. Given a
+        name, backends that keep their own totals answer without loading it.
+        """
+        if isinstance(collection, str):
+            if isinstance(self._storage, SummarizingStorage):
+                return self._storage.summary_by_category(collection)
+            collection = self.load(collection)
 
-    def search(self, collection: Collection, keyword: str) -> list[Item]:
+        return collection.category_totals()
+
+    def search(
+        self, collection: Collection | str, keyword: str, limit: int | None = None
+    ) -> list[Item]:
+        """
+        'collection' may be a loaded Collection or a collection name. Given a
+        name, backends that can search in place do so without loading it.
+        """
         if keyword.strip() == "":
             return []
 
-        key = _norm(keyword)
-        return [i for i in collection.items if key in _norm(i.name)]
+        if isinstance(collection, str):
+            if isinstance(self._storage, SearchableStorage):
+                return self._storage.search(collection, keyword, limit)
+            collection = self.load(collection)
+
+        results = collection.search(_norm(keyword))
+        return results if limit is None else results[:limit]
+
+    def fuzzy_search(
+        self, collection: Collection, keyword: str, max_distance: int = 2
+    ) -> list[Item]:
+        """Typo-tolerant search: whole names within 'max_distance' edits, closest first."""
+        if keyword.strip() == "" or max_distance < 0:
+            return []
+
+        return collection.fuzzy_search(_norm(keyword), max_distance)
+
+    def complete(self, collection: Collection, prefix: str, limit: int = 10) -> list[Item]:
+        """Type-ahead: items whose name starts with 'prefix', most plentiful first."""
+        if prefix.strip() == "" or limit <= 0:
+            return []
+
+        return collection.complete(_norm(prefix), limit)
 
     def set_quantity(
         self,
@@ -129,26 +203,131 @@ class CollectionService:
         if not norm_name or not norm_category or quantity < 0:
             return "not_found"
 
-        existing = next(
-            (
-                i
-                for i in collection.items
-                if _norm(i.name) == norm_name and _norm(i.category) == norm_category
-            ),
-            None,
-        )
+        existing = collection.find(norm_name, norm_category)
 
         if existing is None:
             return "not_found"
 
         if quantity == 0:
-            collection.items.remove(existing)
+            collection.remove(existing)
+            self._write_through(collection, (norm_name, norm_category))
             return "deleted"
 
-        existing.quantity = quantity
-        existing.updated_at = datetime.utcnow()
+        collection.update_quantity(existing, quantity, datetime.utcnow())
+        self._write_through(collection, (norm_name, norm_category))
         return "set"
 
+    def apply_batch(
+        self, collection: Collection, operations: Iterable[BatchOperation]
+    ) -> list[BatchOutcome]:
+        """
+        Apply many add/remove/set operations in a single pass.
+
+        Operations are folded per logical item first (so repeated keys in the
+        batch collapse into one change), then written to the collection once
+        with a shared timestamp. The returned outcomes line up with
+        'operations' and are what the single-item methods would have returned
+        had they been called in the same order ("rejected" marks an invalid add).
+        """
+        outcomes: list[BatchOutcome] = []
+        pending: dict[ItemKey, _PendingItem] = {}
+
+        for operation in operations:
+            key = (_norm(operation.name), _norm(operation.category))
+
+            if not key[0] or not key[1]:
+                outcomes.append("rejected" if operation.op == "add" else "not_found")
+                continue
+
+            state = pending.get(key)
+            if state is None:
+                existing = collection.find(*key)
+                state = _PendingItem(
+                    original=existing,
+                    quantity=existing.quantity if existing else 0,
+                    name=_clean_display(operation.name),
+                    category=_clean_display(operation.category),
+                )
+                pending[key] = state
+
+            outcomes.append(_fold_operation(state, operation))
+
+        now = datetime.utcnow()
+
+        for key, state in pending.items():
+            original = state.original
+
+            if original is not None and (state.quantity == 0 or state.replaced):
+                collection.remove(original)
+            elif original is not None:
+                if state.modified:
+                    collection.update_quantity(original, state.quantity, now)
+                    self._write_through(collection, key)
+                continue
+
+            if state.quantity > 0:
+                collection.append(
+                    Item(
+                        id=uuid4(),
+                        name=state.name,
+                        category=state.category,
+                        quantity=state.quantity,
+                        created_at=now,
+                    )
+                )
+            if original is not None or state.quantity > 0:
+                self._write_through(collection, key, replaced=state.replaced)
+        return outcomes
+
+    def _write_through(self, collection: Collection, key: ItemKey, replaced: bool = False) -> None:
+        if self._item_storage is None:
+            return
+
+        item = collection.find(*key)
+        if item is None or replaced:
+            self._item_storage.delete_item(collection.name, *key)
+        if item is not None:
+            self._item_storage.upsert_item(collection.name, item)
+        collection.mark_item_clean(self._storage, key)
+
+
+def _fold_operation(state: _PendingItem, operation: BatchOperation) -> BatchOutcome:
+    quantity = operation.quantity
+
+    if operation.op == "add":
+        if quantity <= 0:
+            return "rejected"
+        if state.quantity > 0:
+            state.quantity += quantity
+            state.modified = True
+            return "incremented"
+
+        # (re)created inside the batch; a deleted original gets a fresh item
+        state.quantity = quantity
+        state.name = _clean_display(operation.name)
+        state.category = _clean_display(operation.category)
+        state.replaced = state.original is not None
+        return "created"
+
+    if operation.op == "remove":
+        if quantity <= 0 or state.quantity == 0:
+            return "not_found"
+        if state.quantity > quantity:
+            state.quantity -= quantity
+            state.modified = True
+            return "decremented"
+        state.quantity = 0
+        return "deleted"
+
+    if quantity < 0 or state.quantity == 0:
+        return "not_found"
+    if quantity == 0:
+        state.quantity = 0
+        return "deleted"
+    state.quantity = quantity
+    state.modified = True
+    return "set"
+
 
 def _norm(s: str) -> str:
     return s.strip().casefold()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
-from typing import Protocol
+import json
+import os
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Protocol, runtime_checkable
 
-from domain import Collection
+from domain import Collection, Item, item_key
 
 
 class Storage(Protocol):
@@ -12,3 +16,163 @@ class Storage(Protocol):
     def load_collection(self, name: str) -> Collection: ...
 
     def save_collection(self, collection: Collection) -> None: ...
+
+
+@runtime_checkable
+class ItemStorage(Storage, Protocol):
+    """
+    Optional item-level operations.
+
+    Items are addressed by collection name plus item name/category, all
+    matched case-insensitively like everywhere else. Check with
+    isinstance(storage, ItemStorage) whether a backend has them.
+    """
+
+    def get_item(self, collection_name: str, name: str, category: str) -> Item | None: ...
+
+    def upsert_item(self, collection_name: str, item: Item) -> None: ...
+
+    def delete_item(self, collection_name: str, name: str, category: str) -> bool: ...
+
+    def adjust_quantity(
+        self, collection_name: str, name: str, category: str, delta: int
+    ) -> int | None:
+        """
+        Add 'delta' to an item's quantity, deleting it once it drops to 0 or below.
+
+        Returns the new quantity (0 when deleted), or None if there is no such item.
+        """
+        ...
+
+
+@runtime_checkable
+class SearchableStorage(Storage, Protocol):
+    """Optional keyword search that runs inside the backend, without a full load."""
+
+    def search(self, collection_name: str, keyword: str, limit: int | None = None) -> list[Item]:
+        """Same matches as searching the loaded collection, in load_collection() order."""
+        ...
+
+
+@runtime_checkable
+class SummarizingStorage(Storage, Protocol):
+    """Optional per-category totals computed inside the backend."""
+
+    def summary_by_category(self, collection_name: str) -> dict[str, int]:
+        """Same result as summarizing the loaded collection."""
+        ...
+
+
+@runtime_checkable
+class StreamingStorage(Storage, Protocol):
+    """Optional item streaming, so callers need not hold a whole collection."""
+
+    def iter_items(self, collection_name: str, page_size: int = 500) -> Iterator[Item]:
+        """Items in load_collection() order, built a page at a time."""
+        ...
+
+
+@runtime_checkable
+class BatchSavingStorage(Storage, Protocol):
+    """Optional multi-collection save, e.g. one transaction for a whole batch."""
+
+    def save_collections(self, collections: Iterable[Collection]) -> None:
+        """Same end state as save_collection() on each, all or nothing where possible."""
+        ...
+
+
+@runtime_checkable
+class CheckpointStorage(Storage, Protocol):
+    """
+    Optional bookkeeping for resumable migrations into this storage:
+    normalized collection name -> digest of the content written.
+    """
+
+    def load_checkpoints(self) -> dict[str, str]: ...
+
+    def save_checkpoints(self, checkpoints: Mapping[str, str]) -> None:
+        """Add or replace entries; keys are collection names (any case)."""
+        ...
+
+
+class FileCheckpoints:
+    """
+    CheckpointStorage for backends that keep their files in '_data_dir'.
+
+    Each backend sets its own 'checkpoint_file' (one its collection glob
+    doesn't match), so backends sharing a directory don't read each other's.
+    """
+
+    _data_dir: Path
+    checkpoint_file: str
+
+    def load_checkpoints(self) -> dict[str, str]:
+        try:
+            raw = json.loads((self._data_dir / self.checkpoint_file).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(raw, dict):
+            return {}
+        return {k: v for k, v in raw.items() if isinstance(k, str) and isinstance(v, str)}
+
+    def save_checkpoints(self, checkpoints: Mapping[str, str]) -> None:
+        merged = self.load_checkpoints()
+        merged.update((_norm(name), digest) for name, digest in checkpoints.items())
+
+        path = self._data_dir / self.checkpoint_file
+        temp = path.with_name(path.name + ".tmp")
+        with temp.open("w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+
+
+class LoadSaveItemOps(Storage):
+    """
+    ItemStorage fallback built on whole-collection load/save.
+
+    Every call loads and saves the full collection, so this only exists for
+    backends that cannot address single items natively.
+    """
+
+    def get_item(self, collection_name: str, name: str, category: str) -> Item | None:
+        return self.load_collection(collection_name).find(_norm(name), _norm(category))
+
+    def upsert_item(self, collection_name: str, item: Item) -> None:
+        collection = self.load_collection(collection_name)
+        existing = collection.find(*item_key(item))
+        if existing is not None:
+            collection.remove(existing)
+        collection.append(item)
+        self.save_collection(collection)
+
+    def delete_item(self, collection_name: str, name: str, category: str) -> bool:
+        collection = self.load_collection(collection_name)
+        existing = collection.find(_norm(name), _norm(category))
+        if existing is None:
+            return False
+        collection.remove(existing)
+        self.save_collection(collection)
+        return True
+
+    def adjust_quantity(
+        self, collection_name: str, name: str, category: str, delta: int
+    ) -> int | None:
+        collection = self.load_collection(collection_name)
+        existing = collection.find(_norm(name), _norm(category))
+        if existing is None:
+            return None
+
+        quantity = existing.quantity + delta
+        if quantity <= 0:
+            collection.remove(existing)
+            quantity = 0
+        else:
+            collection.update_quantity(existing, quantity, datetime.utcnow())
+        self.save_collection(collection)
+        return quantity
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, overload
+from uuid import UUID
+
+from domain import Collection, Item
+from storage.base import FileCheckpoints, LoadSaveItemOps
+
+# File layout (little endian):
+#
+#   header    32 bytes   HEADER
+#   records   n x 56     RECORD, one per item, in collection order
+#   offsets   (k+1) x 8  start of each string in the blob, plus its end
+#   blob                 UTF-8 strings, each stored once (names, categories,
+#                        the collection name)
+#
+# Timestamps are microseconds since the Unix epoch. Naive datetimes (what
+# the service writes) are stored as-is; aware ones are stored in UTC with
+# FLAG_*_AWARE set and come back as UTC. NO_TIMESTAMP marks a missing updated_at.
+MAGIC = b"CURB"
+FORMAT_VERSION = 1
+SUFFIX = ".cbin"
+
+HEADER = struct.Struct("<4sHHIIIQ4x")
+RECORD = struct.Struct("<16sqqqIII4x")
+OFFSET = struct.Struct("<Q")
+
+NO_TIMESTAMP = -(2**63)
+FLAG_CREATED_AWARE = 1
+FLAG_UPDATED_AWARE = 2
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
+
+
+class BinaryStorage(LoadSaveItemOps, FileCheckpoints):
+    """
+    One fixed-width binary file per collection, read through mmap.
+
+    Much smaller and faster to read than JSON: strings are stored once in a
+    shared table and records decode straight from the mapping. view() and
+    iter_items() decode items only as they are touched.
+    """
+
+    checkpoint_file = ".checkpoints-cbin"
+
+    def __init__(self, data_dir: Path | None = None) -> None:
+        self._data_dir = (Path.home() / ".curation") if data_dir is None else Path(data_dir)
+        self._data_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, name: str) -> Path:
+        return self._data_dir / f"{_norm(name)}{SUFFIX}"
+
+    def list_collections(self) -> Iterable[str]:
+        names: list[str] = []
+
+        for path in sorted(self._data_dir.glob(f"*{SUFFIX}")):
+            try:
+                with BinaryCollectionView(path) as view:
+                    name = view.name
+            except (OSError, ValueError):
+                # skip corrupted/unreadable files
+                continue
+
+            if name.strip():
+                names.append(name)
+
+        return names
+
+    def view(self, name: str) -> BinaryCollectionView | None:
+        """
+        A read-only, lazily decoding sequence of the stored items, or None.
+
+        The file stays mapped until the view is closed (it is a context manager).
+        """
+        path = self._path_for(name)
+        return BinaryCollectionView(path) if path.exists() else None
+
+    def load_collection(self, name: str) -> Collection:
+        view = self.view(name)
+        if view is None:
+            return Collection(name=name)
+
+        with view:
+            collection = Collection(name=view.name, items=list(view))
+
+        collection.mark_clean(self)
+        return collection
+
+    def iter_items(self, collection_name: str, page_size: int = 500) -> Iterator[Item]:
+        """Items decoded one at a time off the mapping ('page_size' is unused)."""
+        view = self.view(collection_name)
+        if view is None:
+            return
+
+        with view:
+            yield from view
+
+    def save_collection(self, collection: Collection) -> None:
+        path = self._path_for(collection.name)
+        temp = path.with_suffix(".tmp")
+
+        changes = collection.changes_since_clean(self)
+        if changes is not None and not changes.upserts and not changes.deletes and path.exists():
+            return
+
+        with temp.open("wb") as f:
+            _write(f, collection)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp, path)
+        collection.mark_clean(self)
+
+
+class BinaryCollectionView(Sequence[Item]):
+    """Items of one binary collection file, decoded on access from an mmap."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, _, name_index, count, string_count, strings_at = HEADER.unpack_from(
+                self._map
+            )
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} collection file")
+
+            self._count: int = count
+            self._strings_at: int = strings_at
+            self._blob_at = strings_at + (string_count + 1) * OFFSET.size
+            if self._blob_at > len(self._map) or HEADER.size + count * RECORD.size > strings_at:
+                raise ValueError(f"{path} is truncated")
+
+            # names/categories repeat a lot; decode each string once
+            self._strings: list[str | None] = [None] * string_count
+            self.name = self._string(name_index)
+        except (struct.error, IndexError) as exc:
+            self._map.close()
+            raise ValueError(f"{path} is truncated") from exc
+        except ValueError:
+            self._map.close()
+            raise
+
+    def __enter__(self) -> BinaryCollectionView:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Item]: ...
+
+    def __getitem__(self, index: int | slice) -> Item | list[Item]:
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(self._count))]
+
+        position = index + self._count if index < 0 else index
+        if not 0 <= position < self._count:
+            raise IndexError("item index out of range")
+        return self._item(position)
+
+    def __iter__(self) -> Iterator[Item]:
+        for index in range(self._count):
+            yield self._item(index)
+
+    def _item(self, index: int) -> Item:
+        raw_id, quantity, created, updated, name, category, flags = RECORD.unpack_from(
+            self._map, HEADER.size + index * RECORD.size
+        )
+        return Item(
+            id=UUID(bytes=raw_id),
+            name=self._string(name),
+            category=self._string(category),
+            quantity=quantity,
+            created_at=_from_micros(created, flags & FLAG_CREATED_AWARE),
+            updated_at=(
+                None
+                if updated == NO_TIMESTAMP
+                else _from_micros(updated, flags & FLAG_UPDATED_AWARE)
+            ),
+        )
+
+    def _string(self, index: int) -> str:
+        cached = self._strings[index]
+        if cached is not None:
+            return cached
+
+        (start,) = OFFSET.unpack_from(self._map, self._strings_at + index * OFFSET.size)
+        (end,) = OFFSET.unpack_from(self._map, self._strings_at + (index + 1) * OFFSET.size)
+        text = self._map[self._blob_at + start : self._blob_at + end].decode("utf-8")
+        self._strings[index] = text
+        return text
+
+
+def _write(f: BinaryIO, collection: Collection) -> None:
+    strings: dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    name_index = intern(collection.name)
+    records = bytearray(RECORD.size * len(collection.items))
+
+    for n, item in enumerate(collection.items):
+        flags = 0
+        created, aware = _to_micros(item.created_at)
+        if aware:
+            flags |= FLAG_CREATED_AWARE
+        if item.updated_at is None:
+            updated = NO_TIMESTAMP
+        else:
+            updated, aware = _to_micros(item.updated_at)
+            if aware:
+                flags |= FLAG_UPDATED_AWARE
+
+        RECORD.pack_into(
+            records,
+            n * RECORD.size,
+            item.id.bytes,
+            item.quantity,
+            created,
+            updated,
+            intern(item.name),
+            intern(item.category),
+            flags,
+        )
+
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = bytearray(OFFSET.size * (len(encoded) + 1))
+    position = 0
+    for n, data in enumerate(encoded):
+        OFFSET.pack_into(offsets, n * OFFSET.size, position)
+        position += len(data)
+    OFFSET.pack_into(offsets, len(encoded) * OFFSET.size, position)
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        name_index,
+        len(collection.items),
+        len(encoded),
+        HEADER.size + len(records),
+    )
+
+    f.write(header)
+    f.write(records)
+    f.write(offsets)
+    for data in encoded:
+        f.write(data)
+
+
+def _to_micros(moment: datetime) -> tuple[int, bool]:
+    if moment.tzinfo is None:
+        return (moment - _EPOCH) // _MICROSECOND, False
+    utc = moment.astimezone(UTC).replace(tzinfo=None)
+    return (utc - _EPOCH) // _MICROSECOND, True
+
+
+def _from_micros(micros: int, aware: int) -> datetime:
+    moment = _EPOCH + micros * _MICROSECOND
+    return moment.replace(tzinfo=UTC) if aware else moment
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from domain import Collection, Item, copy_items
+from storage.base import (
+    BatchSavingStorage,
+    CheckpointStorage,
+    ItemStorage,
+    LoadSaveItemOps,
+    SearchableStorage,
+    Storage,
+    StreamingStorage,
+    SummarizingStorage,
+)
+
+CACHE_MODES = ("write-through", "write-back")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# rough in-memory cost of one Item (object, UUID, int, datetimes, list slot)
+# on top of its two strings; only used to budget the cache
+_ITEM_OVERHEAD = 400
+_COLLECTION_OVERHEAD = 1024
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_bytes: int
+    current_bytes: int
+    collections: int
+
+
+@dataclass
+class _Entry:
+    collection: Collection  # private copy, never handed out
+    size: int
+    dirty: bool = False
+    # the copy matches what 'inner' holds, so loads can be marked clean for it
+    clean_for_inner: bool = False
+
+
+class CachingStorage(LoadSaveItemOps):
+    """
+    An in-memory LRU cache in front of any Storage.
+
+    Loads are served from memory after the first one; callers always get
+    their own copy. In "write-through" mode saves go straight to the inner
+    storage (and refresh the cache); in "write-back" mode they only update
+    the cache and reach the inner storage on flush(), close() or eviction.
+
+    search(), summary_by_category() and iter_items() answer from a cached
+    collection, and otherwise go to the inner storage when it has them.
+    save_collections() and the migration checkpoints go to the inner storage
+    when it has them (checkpoints are empty otherwise).
+    Item-level writes go to the inner storage when it has them, after
+    flushing and dropping the cached collection; otherwise they load and
+    save through the cache.
+
+    The cache is budgeted at 'max_bytes' of approximate collection size.
+    Changes made to the inner storage behind the wrapper's back are not
+    noticed until invalidate().
+    """
+
+    def __init__(
+        self,
+        inner: Storage,
+        mode: str = "write-through",
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode!r}")
+
+        self._inner = inner
+        self._write_back = mode == "write-back"
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.RLock()
+
+    @property
+    def inner(self) -> Storage:
+        return self._inner
+
+    def __enter__(self) -> CachingStorage:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush pending write-back collections, then close the inner storage."""
+        self.flush()
+        close = getattr(self._inner, "close", None)
+        if close is not None:
+            close()
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._max_bytes, self._bytes, len(self._entries)
+            )
+
+    def list_collections(self) -> Iterable[str]:
+        names = list(self._inner.list_collections())
+
+        if self._write_back:
+            # created here but not flushed yet
+            known = {_norm(name) for name in names}
+            with self._lock:
+                unsaved = [
+                    entry.collection.name
+                    for key, entry in self._entries.items()
+                    if entry.dirty and key not in known
+                ]
+            names.extend(sorted(unsaved))
+
+        return names
+
+    def load_collection(self, name: str) -> Collection:
+        key = _norm(name)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._hand_out(entry)
+            self._misses += 1
+
+        collection = self._inner.load_collection(name)
+        clean = collection.changes_since_clean(self._inner) is not None
+
+        with self._lock:
+            if key not in self._entries:
+                self._store(key, collection.copy(), dirty=False, clean_for_inner=clean)
+        return collection
+
+    def save_collection(self, collection: Collection) -> None:
+        key = _norm(collection.name)
+
+        if not self._write_back:
+            self._inner.save_collection(collection)
+            clean = collection.changes_since_clean(self._inner) is not None
+            with self._lock:
+                self._store(key, collection.copy(), dirty=False, clean_for_inner=clean)
+            return
+
+        with self._lock:
+            self._store(key, collection.copy(), dirty=True, clean_for_inner=False)
+
+    def save_collections(self, collections: Iterable[Collection]) -> None:
+        collections = list(collections)
+        if self._write_back:
+            for collection in collections:
+                self.save_collection(collection)
+            return
+
+        if isinstance(self._inner, BatchSavingStorage):
+            self._inner.save_collections(collections)
+        else:
+            for collection in collections:
+                self._inner.save_collection(collection)
+
+        with self._lock:
+            for collection in collections:
+                clean = collection.changes_since_clean(self._inner) is not None
+                self._store(
+                    _norm(collection.name), collection.copy(), dirty=False, clean_for_inner=clean
+                )
+
+    def load_checkpoints(self) -> dict[str, str]:
+        if isinstance(self._inner, CheckpointStorage):
+            return self._inner.load_checkpoints()
+        return {}
+
+    def save_checkpoints(self, checkpoints: Mapping[str, str]) -> None:
+        if isinstance(self._inner, CheckpointStorage):
+            # a checkpoint vouches for what the inner storage holds
+            self.flush()
+            self._inner.save_checkpoints(checkpoints)
+
+    def search(self, collection_name: str, keyword: str, limit: int | None = None) -> list[Item]:
+        key = _norm(keyword)
+        if not key:
+            return []
+
+        with self._lock:
+            cached = self._cached(collection_name)
+            if cached is not None:
+                return copy_items(cached.search(key)[:limit])
+        if isinstance(self._inner, SearchableStorage):
+            return self._inner.search(collection_name, keyword, limit)
+        return self.load_collection(collection_name).search(key)[:limit]
+
+    def summary_by_category(self, collection_name: str) -> dict[str, int]:
+        with self._lock:
+            cached = self._cached(collection_name)
+            if cached is not None:
+                return cached.category_totals()
+        if isinstance(self._inner, SummarizingStorage):
+            return self._inner.summary_by_category(collection_name)
+        return self.load_collection(collection_name).category_totals()
+
+    def iter_items(self, collection_name: str, page_size: int = 500) -> Iterator[Item]:
+        with self._lock:
+            cached = self._cached(collection_name)
+            if cached is not None:
+                return iter(copy_items(cached.items))
+        if isinstance(self._inner, StreamingStorage):
+            return self._inner.iter_items(collection_name, page_size)
+        return iter(self.load_collection(collection_name).items)
+
+    def get_item(self, collection_name: str, name: str, category: str) -> Item | None:
+        with self._lock:
+            cached = self._cached(collection_name)
+            if cached is not None:
+                found = cached.find(_norm(name), _norm(category))
+                return None if found is None else copy_items([found])[0]
+        if isinstance(self._inner, ItemStorage):
+            return self._inner.get_item(collection_name, name, category)
+        return super().get_item(collection_name, name, category)
+
+    def upsert_item(self, collection_name: str, item: Item) -> None:
+        if not isinstance(self._inner, ItemStorage):
+            super().upsert_item(collection_name, item)
+            return
+        with self._lock:
+            self.invalidate(collection_name)
+            self._inner.upsert_item(collection_name, item)
+
+    def delete_item(self, collection_name: str, name: str, category: str) -> bool:
+        if not isinstance(self._inner, ItemStorage):
+            return super().delete_item(collection_name, name, category)
+        with self._lock:
+            self.invalidate(collection_name)
+            return self._inner.delete_item(collection_name, name, category)
+
+    def adjust_quantity(
+        self, collection_name: str, name: str, category: str, delta: int
+    ) -> int | None:
+        if not isinstance(self._inner, ItemStorage):
+            return super().adjust_quantity(collection_name, name, category, delta)
+        with self._lock:
+            self.invalidate(collection_name)
+            return self._inner.adjust_quantity(collection_name, name, category, delta)
+
+    def flush(self) -> None:
+        """Write every pending write-back collection to the inner storage."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.dirty:
+                    self._write(entry)
+
+    def invalidate(self, name: str | None = None) -> None:
+        """
+        Forget one collection (or all of them) so the next load goes to the
+        inner storage. Pending write-back changes are flushed first, not lost.
+        """
+        with self._lock:
+            keys = list(self._entries) if name is None else [_norm(name)]
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry.dirty:
+                    self._write(entry)
+                self._drop(key)
+
+    def _cached(self, name: str) -> Collection | None:
+        # the entry's private copy, for reading under the lock; counts as a hit
+        key = _norm(name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.collection
+
+    def _hand_out(self, entry: _Entry) -> Collection:
+        collection = entry.collection.copy()
+        if entry.clean_for_inner:
+            # keeps the inner storage's delta saves working for cached loads
+            collection.mark_clean(self._inner)
+        return collection
+
+    def _store(self, key: str, collection: Collection, dirty: bool, clean_for_inner: bool) -> None:
+        if key in self._entries:
+            self._drop(key)
+
+        entry = _Entry(collection, _approximate_size(collection), dirty, clean_for_inner)
+        if entry.size > self._max_bytes:
+            # too big to ever fit: don't cache it, but don't lose it either
+            if dirty:
+                self._write(entry)
+            return
+
+        self._entries[key] = entry
+        self._bytes += entry.size
+
+        while self._bytes > self._max_bytes:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            if oldest.dirty:
+                self._write(oldest)
+            self._drop(oldest_key)
+
+    def _write(self, entry: _Entry) -> None:
+        # the entry's own copy is saved and then only ever copied from
+        self._inner.save_collection(entry.collection)
+        entry.dirty = False
+        entry.clean_for_inner = entry.collection.changes_since_clean(self._inner) is not None
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+def _approximate_size(collection: Collection) -> int:
+    return _COLLECTION_OVERHEAD + sum(
+        _ITEM_OVERHEAD + len(item.name) + len(item.category) for item in collection.items
+    )
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
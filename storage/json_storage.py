@@ -2,102 +2,594 @@ from __future__ import annotations
 
 import json
 import os
-from collections.abc import Iterable
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 from pathlib import Path
-from uuid import UUID
+from typing import IO, Any, NamedTuple
+from uuid import UUID, uuid4
 
-from domain import Collection, Item
-from storage.base import Storage
+from domain import ChangeSet, Collection, Item, copy_items, item_key
+from storage.base import FileCheckpoints, LoadSaveItemOps
+from storage.json_stream import (
+    COMPRESSIONS,
+    CompressedWriter,
+    decompressed,
+    iter_collection,
+    read_chunks,
+    write_collection,
+)
 
 DATA_DIR = Path(os.environ.get("CURATION_DATA_DIR", Path.home() / ".curation"))
 
+# listing cache: file name -> {name, name_norm, items, size, mtime_ns}.
+# Deliberately not "*.json" so it is never mistaken for a collection.
+MANIFEST_NAME = ".manifest"
+MANIFEST_VERSION = 1
+
+# journal mode: a save appends one line to "<name>.journal.jsonl"; the log is
+# folded into a fresh snapshot once it reaches JOURNAL_MAX_BYTES or
+# JOURNAL_COMPACT_RATIO times the size of the snapshot. The first record of a
+# journal carries a random "journal" id, and the snapshot it is folded into
+# records that id, so a journal left behind by a crash during compaction is
+# recognized and never replayed twice.
+JOURNAL_SUFFIX = ".journal.jsonl"
+JOURNAL_MAX_BYTES = 8 * 1024 * 1024
+JOURNAL_COMPACT_RATIO = 0.5
+
+# how hard a save works to survive a crash / power loss:
+#   none      no fsync; the OS writes back whenever it likes (bulk, re-runnable jobs)
+#   file      fsync the file's contents (the historical behavior); a rename or new
+#             file may still be lost with the directory entry
+#   file+dir  also fsync the directory after a rename/create/unlink: a save that
+#             returned survives power loss
+#   group     as file+dir, but journal appends and directory syncs are coalesced
+#             into one fsync per GROUP_COMMIT_WINDOW (or flush()/close()); saves
+#             from the last window may be lost, never torn. Only useful with
+#             journal=True: a rewritten snapshot is still fsynced before its
+#             rename, so without a journal every save syncs its file as "file+dir"
+#             would and only the directory syncs are coalesced
+DURABILITY_LEVELS = ("none", "file", "file+dir", "group")
+DEFAULT_DURABILITY = "file"
+GROUP_COMMIT_WINDOW = 0.05
+
+
+# (mtime_ns, size) of a snapshot and of its journal (None when there is none)
+_FileStamp = tuple[int, int, int | None, int | None]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
 def _norm(s: str) -> str:
     return s.strip().casefold()
 
-class JsonStorage(Storage):
-    def __init__(self, data_dir: Path | None = None) -> None:
-        self._data_dir = (
-            (Path.home() / ".curation") if data_dir is None else Path(data_dir)
-        )
+
+class JsonStorage(LoadSaveItemOps, FileCheckpoints):
+    checkpoint_file = ".checkpoints-json"
+
+    def __init__(
+        self,
+        data_dir: Path | None = None,
+        journal: bool = False,
+        journal_max_bytes: int = JOURNAL_MAX_BYTES,
+        compact_ratio: float = JOURNAL_COMPACT_RATIO,
+        durability: str = DEFAULT_DURABILITY,
+        group_window: float = GROUP_COMMIT_WINDOW,
+        compression: str | None = None,
+        compression_level: int | None = None,
+        cache_size: int = 0,
+    ) -> None:
+        """
+        With 'journal', saving a collection this storage loaded appends only
+        the changed items to an operation log instead of rewriting the file;
+        loads replay the log over the last snapshot. Journals left behind are
+        replayed (and folded away by the next save) even without it.
+
+        'durability' is one of DURABILITY_LEVELS; with "group", call flush()
+        or close() to force pending syncs out before the window ends.
+
+        'compression' (one of COMPRESSIONS, at 'compression_level') applies to
+        snapshots written from now on. Files keep their .json name and are
+        recognized by content, so plain and compressed files can be mixed.
+
+        'cache_size' > 0 keeps that many parsed collections in memory (LRU),
+        reused for as long as the file's mtime and size (and its journal's)
+        are unchanged. Every load gets its own copies of the cached items.
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability!r}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        if compression_level is not None and not 0 <= compression_level <= 9:
+            raise ValueError(f"Compression level must be 0-9, got {compression_level}")
+
+        self._data_dir = (Path.home() / ".curation") if data_dir is None else Path(data_dir)
         self._data_dir.mkdir(parents=True, exist_ok=True)
+        self._journal = journal
+        self._journal_max_bytes = journal_max_bytes
+        self._compact_ratio = compact_ratio
+        self._durability = durability
+        self._group_window = group_window
+        self._compression = compression
+        self._compression_level = compression_level
+        self._lock = threading.Lock()
+        self._pending: set[Path] = set()
+        self._pending_dir = False
+        self._timer: threading.Timer | None = None
+        self._cache_size = cache_size
+        self._cache: OrderedDict[Path, tuple[_FileStamp, str, list[Item]]] = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # normalized name -> file saved under its display name by an older
+        # version; scanned once, on the first lookup that misses
+        self._legacy: dict[str, Path] | None = None
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._cache_hits, self._cache_misses, self._cache_size, len(self._cache)
+            )
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_hits = self._cache_misses = 0
+
+    def _cache_get(self, path: Path, stamp: _FileStamp) -> tuple[str, list[Item]] | None:
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is None or entry[0] != stamp:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(path)
+            self._cache_hits += 1
+            return entry[1], entry[2]
+
+    def _cache_put(
+        self, path: Path, stamp: _FileStamp | None, name: str, items: list[Item]
+    ) -> None:
+        # 'items' must be private to the cache; callers only ever get copies
+        with self._lock:
+            if stamp is None:
+                self._cache.pop(path, None)
+                return
+            self._cache[path] = (stamp, name, items)
+            self._cache.move_to_end(path)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def __enter__(self) -> JsonStorage:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        """Sync everything group commit has deferred so far."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            pending_dir, self._pending_dir = self._pending_dir, False
+            timer, self._timer = self._timer, None
+
+        if timer is not None:
+            timer.cancel()
+        for path in pending:
+            _fsync_path(path)
+        if pending_dir:
+            _fsync_path(self._data_dir)
+
+    def _defer_sync(self, path: Path | None) -> None:
+        with self._lock:
+            if path is not None:
+                self._pending.add(path)
+            self._pending_dir = True
+            if self._timer is None:
+                # a non-daemon timer, so exiting the interpreter still flushes
+                self._timer = threading.Timer(self._group_window, self.flush)
+                self._timer.start()
+
+    def _synced(self, path: Path | None, new_entry: bool) -> None:
+        # finish a write per the durability level: 'path' is a journal just
+        # appended to, 'new_entry' when a directory entry was added/replaced
+        if self._durability == "group":
+            if path is not None or new_entry:
+                self._defer_sync(path)
+        elif self._durability == "file+dir" and new_entry:
+            _fsync_path(self._data_dir)
+
+    def _remember(self, path: Path, journal: Path, collection: Collection) -> None:
+        # what was just written is what the next load would parse
+        if self._cache_size > 0:
+            stamp = _file_stamp(path, journal)
+            self._cache_put(path, stamp, collection.name, copy_items(collection.items))
+
+    def _sync_snapshot(self, f: IO[Any]) -> None:
+        f.flush()
+        if self._durability != "none":
+            # even group commit syncs here: the rename must not expose a torn file
+            os.fsync(f.fileno())
+
+    def _fsyncs_journal(self) -> bool:
+        return self._durability in ("file", "file+dir")
 
     def _path_for(self, name: str) -> Path:
-        return self._data_dir / f"{name}.json"
+        return self._data_dir / f"{_norm(name)}.json"
+
+    def _journal_path_for(self, name: str) -> Path:
+        return self._data_dir / f"{_norm(name)}{JOURNAL_SUFFIX}"
+
+    def _legacy_path_for(self, name: str) -> Path | None:
+        # older versions named files after the display name ("Cigars.json")
+        with self._lock:
+            if self._legacy is None:
+                self._legacy = {
+                    _norm(candidate.stem): candidate
+                    for candidate in self._data_dir.glob("*.json")
+                    if candidate.stem != _norm(candidate.stem)
+                }
+            path = self._legacy.get(_norm(name))
+        return path if path is not None and path.exists() else None
 
     def list_collections(self) -> Iterable[str]:
+        """
+        Names of the stored collections, read from the manifest.
+
+        Only files whose size or mtime no longer match their manifest entry
+        (or that have none) are parsed, so listing an unchanged data dir costs
+        one stat per collection.
+        """
         self._data_dir.mkdir(parents=True, exist_ok=True)
 
+        manifest = self._read_manifest()
+        entries: dict[str, dict[str, Any]] = {}
         names: list[str] = []
 
         for path in sorted(self._data_dir.glob("*.json")):
             try:
-                payload = json.loads(path.read_text(encoding="utf-8"))
-            except (OSError, json.JSONDecodeError):
-                # skip corrupted/unreadable files
+                stat = path.stat()
+            except OSError:
                 continue
 
-            name = payload.get("name")
+            entry = manifest.get(path.name)
+            if entry is None or not _entry_matches(entry, stat):
+                try:
+                    name, count = _scan_file(path)
+                except (OSError, ValueError):
+                    # corrupted/unreadable: remembered so it is not re-parsed
+                    name, count = None, 0
+                entry = _manifest_entry(name, count, stat)
 
+            entries[path.name] = entry
+            name = entry["name"]
             if isinstance(name, str) and name.strip():
                 names.append(name)
 
+        if entries != manifest:
+            self._write_manifest(entries)
+
         return names
 
-    def load_collection(self, name: str) -> Collection:
+    def _manifest_path(self) -> Path:
+        return self._data_dir / MANIFEST_NAME
+
+    def _read_manifest(self) -> dict[str, dict[str, Any]]:
+        try:
+            raw = json.loads(self._manifest_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(raw, dict) or raw.get("version") != MANIFEST_VERSION:
+            return {}
+        collections = raw.get("collections")
+        return collections if isinstance(collections, dict) else {}
+
+    def _write_manifest(self, entries: dict[str, dict[str, Any]]) -> None:
+        # atomic but not fsynced: a lost or stale manifest is rebuilt from stat
+        path = self._manifest_path()
+        temp = path.with_name(path.name + ".tmp")
+        payload = {"version": MANIFEST_VERSION, "collections": entries}
+
+        try:
+            temp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(temp, path)
+        except OSError:
+            pass
+
+    def _update_manifest(self, path: Path, collection: Collection, removed: Path | None) -> None:
+        manifest = self._read_manifest()
+        manifest[path.name] = _manifest_entry(collection.name, len(collection.items), path.stat())
+        if removed is not None:
+            manifest.pop(removed.name, None)
+        self._write_manifest(manifest)
+
+    def _existing_path_for(self, name: str) -> Path | None:
         path = self._path_for(name)
-        legacy = self._data_dir / f"{name}.json"
-        
-        if not path.exists() and legacy.exists():
-            path = legacy
-        
-        if not path.exists():
+        return path if path.exists() else self._legacy_path_for(name)
+
+    def load_collection(self, name: str) -> Collection:
+        path = self._existing_path_for(name)
+        if path is None:
             return Collection(name=name)
 
-        with path.open("r", encoding="utf-8") as f:
-            raw = json.load(f)
-
-        items = [
-            Item(
-                id=UUID(item["id"]),
-                name=item["name"],
-                category=item["category"],
-                quantity=item["quantity"],
-                created_at=datetime.fromisoformat(item["created_at"]),
-                updated_at=(
-                    datetime.fromisoformat(item["updated_at"]) if item.get("updated_at") else None
-                ),
-            )
-            for item in raw.get("items", [])
-        ]
-        
-        display_name = raw.get("name", name)
-        return Collection(name=display_name, items=items)
+        journal = self._journal_path_for(name)
+
+        stamp = _file_stamp(path, journal) if self._cache_size > 0 else None
+        cached = None if stamp is None else self._cache_get(path, stamp)
+        if cached is not None:
+            display_name, cached_items = cached
+            collection = Collection(name=display_name, items=copy_items(cached_items))
+            collection.mark_clean(self)
+            return collection
+
+        display_name = name
+        folded: object = None
+        items: list[Item] = []
+
+        for key, value in _read_document(path):
+            if key == "item":
+                items.append(_item_from_dict(value))
+            elif key == "name" and isinstance(value, str):
+                display_name = value
+            elif key == "journal":
+                folded = value
+
+        if journal.exists() and not _is_folded(journal, folded):
+            items = _replay_journal(items, journal)
+
+        if stamp is not None:
+            self._cache_put(path, stamp, display_name, copy_items(items))
+
+        collection = Collection(name=display_name, items=items)
+        collection.mark_clean(self)
+        return collection
+
+    def iter_items(self, collection_name: str, page_size: int = 500) -> Iterator[Item]:
+        """Items parsed straight off the file, one at a time ('page_size' is unused)."""
+        path = self._existing_path_for(collection_name)
+        if path is None:
+            return
+
+        if self._journal_path_for(collection_name).exists():
+            # pending journal records can touch any item: replay them first
+            yield from self.load_collection(collection_name).items
+            return
+
+        for key, value in _read_document(path):
+            if key == "item":
+                yield _item_from_dict(value)
 
     def save_collection(self, collection: Collection) -> None:
         path = self._path_for(collection.name)
         temp = path.with_suffix(".tmp")
 
-        payload = {
-            "name": collection.name,
-            "items": [
-                {
-                    "id": str(item.id),
-                    "name": item.name,
-                    "category": item.category,
-                    "quantity": item.quantity,
-                    "created_at": item.created_at.isoformat(),
-                    "updated_at": item.updated_at.isoformat() if item.updated_at else None,
-                }
-                for item in collection.items
-            ],
-        }
+        # JSON files can only be rewritten whole, but an untouched collection
+        # does not need writing at all
+        changes = collection.changes_since_clean(self)
+        if changes is not None and not changes.upserts and not changes.deletes and path.exists():
+            return
 
-        with temp.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
+        journal = self._journal_path_for(collection.name)
+
+        if self._journal and changes is not None and path.exists():
+            if journal.exists() and _is_folded(journal, _folded_journal(path)):
+                # left behind by a crash during compaction: start a new one
+                journal.unlink()
+            created = not journal.exists()
+            journal_size = _append_journal(journal, changes, sync=self._fsyncs_journal())
+            self._synced(journal, new_entry=created)
+            snapshot_size = path.stat().st_size
+            if (
+                journal_size < self._journal_max_bytes
+                and journal_size < self._compact_ratio * snapshot_size
+            ):
+                collection.mark_clean(self)
+                self._remember(path, journal, collection)
+                self._update_manifest(path, collection, None)
+                return
+
+        # the journal (if any) is folded into this snapshot; recording its id
+        # keeps a crash between the replace and the unlink below from
+        # replaying it over the snapshot (journals from before ids were
+        # recorded have none, and keep that window)
+        journal_id = _journal_id(journal)
+        extra = None if journal_id is None else {"journal": journal_id}
+        items = map(_item_to_dict, collection.items)
+        if self._compression is None:
+            with temp.open("w", encoding="utf-8") as f:
+                write_collection(f, collection.name, items, extra)
+                self._sync_snapshot(f)
+        else:
+            with temp.open("wb") as raw:
+                writer = CompressedWriter(raw, self._compression, self._compression_level)
+                write_collection(writer, collection.name, items, extra)
+                writer.finish()
+                self._sync_snapshot(raw)
 
         os.replace(temp, path)
-        
+        journal.unlink(missing_ok=True)
+        self._synced(None, new_entry=True)
+        collection.mark_clean(self)
+        self._remember(path, journal, collection)
+
+        # drop the file an older version saved under the display name (the
+        # one loads fall back to, whatever its case)
+        legacy = self._legacy_path_for(collection.name)
+        removed = None
+        if legacy is not None and not legacy.samefile(path):
+            legacy.unlink()
+            removed = legacy
+        with self._lock:
+            if self._legacy is not None:
+                self._legacy.pop(_norm(collection.name), None)
+
+        self._update_manifest(path, collection, removed)
+
+
+def _scan_file(path: Path) -> tuple[str | None, int]:
+    name: str | None = None
+    count = 0
+
+    for key, value in _read_document(path):
+        if key == "item":
+            count += 1
+        elif key == "name" and isinstance(value, str):
+            name = value
+    return name, count
+
+
+def _file_stamp(path: Path, journal: Path) -> _FileStamp | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    try:
+        journal_stat = journal.stat()
+    except FileNotFoundError:
+        return stat.st_mtime_ns, stat.st_size, None, None
+    return stat.st_mtime_ns, stat.st_size, journal_stat.st_mtime_ns, journal_stat.st_size
+
+
+def _read_document(path: Path) -> Iterator[tuple[str, object]]:
+    with path.open("rb") as f:
+        yield from iter_collection(decompressed(read_chunks(f)))
+
+
+def _append_journal(journal: Path, changes: ChangeSet, sync: bool = True) -> int:
+    """Append one save as a single line; returns the new size of the log."""
+    record: dict[str, object] = {
+        "deletes": [list(key) for key in changes.deletes],
+        "upserts": [_item_to_dict(item) for item in changes.upserts],
+    }
+
+    with journal.open("a+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                # drop a record torn by a crash during the previous append
+                f.seek(0)
+                f.truncate(f.read().rfind(b"\n") + 1)
+                end = f.seek(0, os.SEEK_END)
+        if not end:
+            record = {"journal": uuid4().hex, **record}
+        f.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        return f.tell()
+
+
+def _journal_id(journal: Path) -> str | None:
+    # the id carried by the first record; None without one (or no journal)
+    try:
+        with journal.open("rb") as f:
+            first = f.readline()
+        record = json.loads(first)
+    except (OSError, ValueError):
+        return None
+    value = record.get("journal") if isinstance(record, dict) else None
+    return value if isinstance(value, str) else None
+
+
+def _folded_journal(path: Path) -> object:
+    # the "journal" member of a snapshot; it comes before the items
+    for key, value in _read_document(path):
+        if key == "journal":
+            return value
+        if key == "item":
+            break
+    return None
+
+
+def _is_folded(journal: Path, folded: object) -> bool:
+    return folded is not None and _journal_id(journal) == folded
+
+
+def _fsync_path(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # gone already, or a directory that can't be opened (Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _replay_journal(items: list[Item], journal: Path) -> list[Item]:
+    current: dict[tuple[str, str], Item] = {item_key(item): item for item in items}
+
+    with journal.open("rb") as f:
+        lines = f.read().split(b"\n")
+
+    for number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if number == len(lines) - 1:
+                # torn final append: that save never completed
+                break
+            raise
+
+        for name_norm, category_norm in record.get("deletes", []):
+            current.pop((name_norm, category_norm), None)
+        for raw in record.get("upserts", []):
+            item = _item_from_dict(raw)
+            current[item_key(item)] = item
+
+    # untouched items keep their snapshot order; new ones follow
+    return list(current.values())
+
+
+def _manifest_entry(name: str | None, count: int, stat: os.stat_result) -> dict[str, Any]:
+    return {
+        "name": name,
+        "name_norm": _norm(name) if name is not None else None,
+        "items": count,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _entry_matches(entry: dict[str, Any], stat: os.stat_result) -> bool:
+    return (
+        isinstance(entry, dict)
+        and entry.get("size") == stat.st_size
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+    )
+
+
+def _item_to_dict(item: Item) -> dict[str, object]:
+    return {
+        "id": str(item.id),
+        "name": item.name,
+        "category": item.category,
+        "quantity": item.quantity,
+        "created_at": item.created_at.isoformat(),
+        "updated_at": item.updated_at.isoformat() if item.updated_at else None,
+    }
+
 
+def _item_from_dict(raw: Any) -> Item:
+    return Item(
+        id=UUID(raw["id"]),
+        name=raw["name"],
+        category=raw["category"],
+        quantity=raw["quantity"],
+        created_at=datetime.fromisoformat(raw["created_at"]),
+        updated_at=(datetime.fromisoformat(raw["updated_at"]) if raw.get("updated_at") else None),
+    )
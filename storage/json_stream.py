@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import codecs
+import json
+import lzma
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import chain
+from typing import BinaryIO, Protocol
+
+CHUNK_SIZE = 64 * 1024
+
+# on-disk compression; the format is recognized from its magic bytes on read,
+# so plain and compressed files can sit side by side
+COMPRESSIONS = ("gzip", "lzma", "zlib")
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class TextSink(Protocol):
+    def write(self, text: str, /) -> object: ...
+
+
+class _Decompressor(Protocol):
+    def decompress(self, data: bytes, /) -> bytes: ...
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes, /) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class CompressedWriter:
+    """A TextSink that UTF-8 encodes and compresses into a binary file."""
+
+    def __init__(self, raw: BinaryIO, compression: str, level: int | None = None) -> None:
+        self._raw = raw
+        self._compressor = _compressor(compression, level)
+
+    def write(self, text: str, /) -> int:
+        self._raw.write(self._compressor.compress(text.encode("utf-8")))
+        return len(text)
+
+    def finish(self) -> None:
+        self._raw.write(self._compressor.flush())
+
+
+def _compressor(compression: str, level: int | None) -> _Compressor:
+    if compression == "gzip":
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == "zlib":
+        return zlib.compressobj(6 if level is None else level)
+    if compression == "lzma":
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    raise ValueError(f"Unknown compression: {compression!r}")
+
+
+def read_chunks(f: BinaryIO, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    while chunk := f.read(size):
+        yield chunk
+
+
+def decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Pass plain chunks through; gzip, xz and zlib streams are decompressed."""
+    chunks = iter(chunks)
+
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(_XZ_MAGIC):
+            break
+
+    decompressor: _Decompressor
+    if head.startswith(_GZIP_MAGIC):
+        decompressor = zlib.decompressobj(31)
+    elif head.startswith(_XZ_MAGIC):
+        decompressor = lzma.LZMADecompressor()
+    elif len(head) >= 2 and head[0] & 0x0F == 8 and int.from_bytes(head[:2]) % 31 == 0:
+        # a zlib header (CMF/FLG); no JSON document can start with these bytes
+        decompressor = zlib.decompressobj()
+    else:
+        yield head
+        yield from chunks
+        return
+
+    for chunk in chain((head,), chunks):
+        yield decompressor.decompress(chunk)
+
+
+def write_collection(
+    out: TextSink,
+    name: str,
+    items: Iterable[dict[str, object]],
+    extra: Mapping[str, object] | None = None,
+) -> None:
+    """
+    Write a collection document one item at a time.
+
+    The output is byte-for-byte what json.dump({"name": ..., **extra,
+    "items": [...]}, indent=2) produces, without the whole payload ever being
+    held in memory. 'extra' members come before the items, so readers can
+    get at them without parsing the items.
+    """
+    out.write('{\n  "name": ' + json.dumps(name))
+    for key, value in (extra or {}).items():
+        out.write(
+            ",\n  " + json.dumps(key) + ": " + json.dumps(value, indent=2).replace("\n", "\n  ")
+        )
+    out.write(',\n  "items": [')
+
+    first = True
+    for item in items:
+        # nested one level deeper than json.dumps() puts it
+        out.write("\n    " if first else ",\n    ")
+        out.write(json.dumps(item, indent=2).replace("\n", "\n    "))
+        first = False
+
+    out.write("]\n}" if first else "\n  ]\n}")
+
+
+def iter_collection(chunks: Iterable[bytes]) -> Iterator[tuple[str, object]]:
+    """
+    Parse a collection document incrementally.
+
+    Yields ("item", dict) for every element of the top-level "items" array and
+    (key, value) for every other top-level member, in document order. Only the
+    value being decoded (plus one chunk) is buffered at a time, so memory stays
+    bounded by the largest single item rather than by the file.
+
+    Raises json.JSONDecodeError on malformed input.
+    """
+    reader = _Reader(chunks)
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.advance()
+        return
+
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise reader.error("Expecting property name")
+        reader.expect(":")
+
+        if key == "items" and reader.peek() == "[":
+            reader.advance()
+            if reader.peek() == "]":
+                reader.advance()
+            else:
+                while True:
+                    yield "item", reader.value()
+                    if reader.separator("]"):
+                        break
+        else:
+            yield key, reader.value()
+
+        if reader.separator("}"):
+            return
+
+
+class _Reader:
+    # a sliding window over the decoded text; consumed text is dropped
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self._text = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        if self._pos:
+            self._text = self._text[self._pos :]
+            self._pos = 0
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._text += self._decode(b"", final=True)
+        else:
+            self._text += self._decode(chunk)
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._text, self._pos)
+
+    def peek(self) -> str:
+        while True:
+            text, pos = self._text, self._pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self._fill():
+                raise self.error("Unexpected end of document")
+
+    def advance(self) -> None:
+        self._pos += 1
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self.advance()
+
+    def separator(self, closing: str) -> bool:
+        """Consume ',' (returns False) or 'closing' (returns True)."""
+        char = self.peek()
+        self.advance()
+        if char == closing:
+            return True
+        if char != ",":
+            raise self.error(f"Expecting ',' or {closing!r}")
+        return False
+
+    def value(self) -> object:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._text, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+
+            # a number running into the end of the window may be cut short
+            if end == len(self._text) and self._fill():
+                continue
+
+            self._pos = end
+            return value
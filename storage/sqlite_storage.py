@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import sqlite3
-from collections.abc import Iterable
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from uuid import UUID
@@ -9,6 +11,10 @@ from uuid import UUID
 from domain import Collection, Item
 from storage.base import Storage
 
+# Bump whenever SCHEMA_SQL changes; init_database() only runs the DDL when the
+# file's PRAGMA user_version is behind.
+SCHEMA_VERSION = 5
+
 SCHEMA_SQL = """
 PRAGMA foreign_keys = ON;
 
@@ -37,12 +43,150 @@ CREATE TABLE IF NOT EXISTS items(
 CREATE INDEX IF NOT EXISTS id_items_collection ON items(collection_id);
 CREATE INDEX IF NOT EXISTS idx_items_search ON items (collection_id, name_norm);
 CREATE INDEX IF NOT EXISTS idx_items_category ON items(collection_id, category_norm);
+CREATE INDEX IF NOT EXISTS idx_items_order ON items(collection_id, category_norm, name_norm);
+
+-- running quantity totals per (collection, display category), the same keys
+-- CollectionService.summary_by_category reports; 'items' counts the rows
+-- contributing so a category disappears with its last item
+CREATE TABLE IF NOT EXISTS category_totals(
+    collection_id   INTEGER NOT NULL,
+    category        TEXT NOT NULL,
+    category_norm   TEXT NOT NULL,
+    total           INTEGER NOT NULL,
+    items           INTEGER NOT NULL,
+
+    PRIMARY KEY (collection_id, category),
+    FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS category_totals_insert AFTER INSERT ON items BEGIN
+    INSERT INTO category_totals (collection_id, category, category_norm, total, items)
+    VALUES (new.collection_id, new.category, new.category_norm, new.quantity, 1)
+    ON CONFLICT (collection_id, category) DO UPDATE SET
+        total = total + excluded.total,
+        items = items + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS category_totals_delete AFTER DELETE ON items BEGIN
+    UPDATE category_totals SET total = total - old.quantity, items = items - 1
+    WHERE collection_id = old.collection_id AND category = old.category;
+    DELETE FROM category_totals
+    WHERE collection_id = old.collection_id AND category = old.category AND items <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS category_totals_update
+AFTER UPDATE OF collection_id, category, quantity ON items BEGIN
+    UPDATE category_totals SET total = total - old.quantity, items = items - 1
+    WHERE collection_id = old.collection_id AND category = old.category;
+    DELETE FROM category_totals
+    WHERE collection_id = old.collection_id AND category = old.category AND items <= 0;
+    INSERT INTO category_totals (collection_id, category, category_norm, total, items)
+    VALUES (new.collection_id, new.category, new.category_norm, new.quantity, 1)
+    ON CONFLICT (collection_id, category) DO UPDATE SET
+        total = total + excluded.total,
+        items = items + 1;
+END;
+
+-- resumable migrations into this database: collection -> content digest of
+-- what was written (see storage.migrate.content_digest)
+CREATE TABLE IF NOT EXISTS migration_checkpoints(
+    name_norm       TEXT PRIMARY KEY,
+    digest          TEXT NOT NULL,
+    completed_at    TEXT NOT NULL
+);
 """
 
+# Only run when the SQLite library has the trigram tokenizer (3.34+); without
+# it search() falls back to scanning name_norm with instr().
+FTS_SCHEMA_SQL = """
+-- substring search over name_norm; external content, kept in sync by triggers.
+-- FTS rows point at items.rowid, so run `INSERT INTO items_fts(items_fts)
+-- VALUES ('rebuild')` after a VACUUM (which may renumber rowids).
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name_norm,
+    content = 'items',
+    content_rowid = 'rowid',
+    tokenize = 'trigram case_sensitive 1'
+);
 
-def connect(database_path: Path) -> sqlite3.Connection:
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, name_norm) VALUES (new.rowid, new.name_norm);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name_norm)
+    VALUES ('delete', old.rowid, old.name_norm);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name_norm ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name_norm)
+    VALUES ('delete', old.rowid, old.name_norm);
+    INSERT INTO items_fts (rowid, name_norm) VALUES (new.rowid, new.name_norm);
+END;
+"""
+
+# FTS5 trigram tokens are 3 characters; shorter needles cannot use the index
+_FTS_MIN_NEEDLE = 3
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """Connection PRAGMAs applied by SQLiteStorage."""
+
+    journal_mode: str
+    synchronous: str
+    mmap_size: int  # bytes, 0 disables memory-mapped I/O
+    cache_size: int  # negative = KiB, per SQLite convention
+    temp_store: str
+
+
+# Durability trade-offs:
+# - durable: rollback journal + synchronous=FULL. Every commit is on disk when
+#   save returns; readers block while a writer commits. Slowest writes.
+# - balanced: WAL + synchronous=NORMAL. Readers no longer block behind the
+#   writer and commits skip most fsyncs. A power loss can drop the last few
+#   commits, but the database itself stays consistent.
+# - throughput: WAL + synchronous=OFF with a large cache and mmap. An OS crash
+#   or power loss can lose recent commits and, rarely, corrupt the file. For
+#   bulk imports that can be re-run, not for the only copy of your data.
+PROFILES: dict[str, SQLiteProfile] = {
+    "durable": SQLiteProfile(
+        journal_mode="DELETE",
+        synchronous="FULL",
+        mmap_size=0,
+        cache_size=-2_000,
+        temp_store="DEFAULT",
+    ),
+    "balanced": SQLiteProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=64 * 1024 * 1024,
+        cache_size=-16_000,
+        temp_store="MEMORY",
+    ),
+    "throughput": SQLiteProfile(
+        journal_mode="WAL",
+        synchronous="OFF",
+        mmap_size=256 * 1024 * 1024,
+        cache_size=-64_000,
+        temp_store="MEMORY",
+    ),
+}
+
+DEFAULT_PROFILE = "durable"
+
+
+def apply_profile(conn: sqlite3.Connection, profile: SQLiteProfile) -> None:
+    conn.execute(f"PRAGMA journal_mode = {profile.journal_mode};")
+    conn.execute(f"PRAGMA synchronous = {profile.synchronous};")
+    conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)};")
+    conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)};")
+    conn.execute(f"PRAGMA temp_store = {profile.temp_store};")
+
+
+def connect(database_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
     database_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(database_path)
+    conn = sqlite3.connect(database_path, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
 
     # FK enforcement always enabled for connection
@@ -50,8 +194,48 @@ def connect(database_path: Path) -> sqlite3.Connection:
     return conn
 
 
+def supports_trigram(conn: sqlite3.Connection) -> bool:
+    """Whether this SQLite build has FTS5 with the trigram tokenizer."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.trigram_probe USING fts5(t, tokenize = 'trigram');")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.trigram_probe;")
+    return True
+
+
+def has_fts_index(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts';"
+    ).fetchone()
+    return row is not None
+
+
 def init_database(conn: sqlite3.Connection) -> None:
+    version = int(conn.execute("PRAGMA user_version;").fetchone()[0])
+    if version >= SCHEMA_VERSION:
+        return
+
     conn.executescript(SCHEMA_SQL)
+
+    if not has_fts_index(conn) and supports_trigram(conn):
+        conn.executescript(FTS_SCHEMA_SQL)
+        # index rows written before items_fts existed
+        conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild');")
+
+    if version < 3:
+        # totals for rows written before the triggers existed
+        conn.execute("DELETE FROM category_totals;")
+        conn.execute(
+            """
+            INSERT INTO category_totals (collection_id, category, category_norm, total, items)
+            SELECT collection_id, category, MIN(category_norm), SUM(quantity), COUNT(*)
+            FROM items
+            GROUP BY collection_id, category;
+            """
+        )
+
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
     conn.commit()
 
 
@@ -71,159 +255,436 @@ def _parse_datetime(raw: str) -> datetime:
 
 
 class SQLiteStorage(Storage):
-    def __init__(self, database_path: Path) -> None:
-        self._database_path = database_path
+    """
+    SQLite backend.
 
-    def list_collections(self) -> Iterable[str]:
-        conn = connect(self._database_path)
+    Each thread gets one long-lived connection, opened on first use; the
+    schema is checked once per storage instead of on every call. Call close()
+    (or use the storage as a context manager) to release the connections.
 
-        try:
-            init_database(conn)
-            rows = conn.execute("SELECT name FROM collections ORDER BY name;").fetchall()
-            return [str(row["name"]) for row in rows]
-        finally:
+    'profile' names one of PROFILES and trades durability for speed.
+    """
+
+    def __init__(self, database_path: Path, profile: str = DEFAULT_PROFILE) -> None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown SQLite profile: {profile!r}")
+
+        self._database_path = database_path
+        self._profile = PROFILES[profile]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._schema_ready = False
+        self._fts = False
+
+    def __enter__(self) -> SQLiteStorage:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
             conn.close()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        # connections are only ever used by the thread that opened them;
+        # check_same_thread is off so close() can run from any thread
+        conn = connect(self._database_path, check_same_thread=False)
+        apply_profile(conn, self._profile)
+        with self._lock:
+            if not self._schema_ready:
+                init_database(conn)
+                self._fts = has_fts_index(conn)
+                self._schema_ready = True
+            self._connections.append(conn)
+        self._local.conn = conn
+        return conn
+
+    def list_collections(self) -> Iterable[str]:
+        conn = self._connection()
+        rows = conn.execute("SELECT name FROM collections ORDER BY name;").fetchall()
+        return [str(row["name"]) for row in rows]
 
     def load_collection(self, name: str) -> Collection:
         name_norm = _norm(name)
         display_name = _clean_display(name)
 
-        conn = connect(self._database_path)
-
-        try:
-            init_database(conn)
-
-            collection_row = conn.execute(
-                "SELECT id, name FROM collections WHERE name_norm = ?;",
-                (name_norm,),
-            ).fetchone()
-
-            if collection_row is None:
-                return Collection(name=display_name, items=[])
-
-            collection_id = int(collection_row["id"])
-            collection_name = str(collection_row["name"])
-
-            item_rows = conn.execute(
-                """
-                SELECT id, name, category, quantity, created_at, updated_at
-                FROM items
-                WHERE collection_id = ?
-                ORDER BY category_norm, name_norm;
-                """,
-                (collection_id,),
-            ).fetchall()
-
-            items: list[Item] = []
-
-            for row in item_rows:
-                created_at = _parse_datetime(str(row["created_at"]))
-                updated_raw = row["updated_at"]
-                updated_at = _parse_datetime(str(updated_raw)) if updated_raw is not None else None
-
-                items.append(
-                    Item(
-                        id=UUID(str(row["id"])),
-                        name=str(row["name"]),
-                        category=str(row["category"]),
-                        quantity=int(row["quantity"]),
-                        created_at=created_at,
-                        updated_at=updated_at,
-                    )
-                )
-            return Collection(name=collection_name, items=items)
-        finally:
-            conn.close()
+        conn = self._connection()
+        collection_row = conn.execute(
+            "SELECT id, name FROM collections WHERE name_norm = ?;",
+            (name_norm,),
+        ).fetchone()
+
+        if collection_row is None:
+            return Collection(name=display_name, items=[])
+
+        collection_id = int(collection_row["id"])
+        collection_name = str(collection_row["name"])
+
+        item_rows = conn.execute(
+            """
+            SELECT id, name, category, quantity, created_at, updated_at
+            FROM items
+            WHERE collection_id = ?
+            ORDER BY category_norm, name_norm;
+            """,
+            (collection_id,),
+        ).fetchall()
+
+        items = [_row_to_item(row) for row in item_rows]
+        collection = Collection(name=collection_name, items=items)
+        collection.mark_clean(self)
+        return collection
 
     def save_collection(self, collection: Collection) -> None:
-        conn = connect(self._database_path)
-        try:
-            init_database(conn)
-
-            collection_display = _clean_display(collection.name)
-            collection_normal = _norm(collection.name)
-            now = datetime.utcnow().isoformat()
-
-            with conn:
-                # all or nothing save
-                # upsert collection using logical key by name_norm
+        self.save_collections([collection])
+
+    def save_collections(self, collections: Iterable[Collection]) -> None:
+        """Save several collections in one transaction: all of them or none."""
+        collections = list(collections)
+        conn = self._connection()
+        now = datetime.utcnow().isoformat()
+
+        with conn:
+            for collection in collections:
+                self._save_in(conn, collection, now)
+
+        # only once the transaction has committed
+        for collection in collections:
+            collection.mark_clean(self)
+
+    def _save_in(self, conn: sqlite3.Connection, collection: Collection, now: str) -> None:
+        collection_display = _clean_display(collection.name)
+        collection_normal = _norm(collection.name)
+
+        # upsert collection using logical key by name_norm
+        conn.execute(
+            """
+                     INSERT INTO collections (name, name_norm, created_at)
+                     VALUES (?, ?, ?)
+                     ON CONFLICT(name_norm) DO UPDATE SET
+                        name = excluded.name;
+                     """,
+            (collection_display, collection_normal, now),
+        )
+
+        row = conn.execute(
+            "SELECT id FROM collections WHERE name_norm = ?;",
+            (collection_normal,),
+        ).fetchone()
+
+        if row is None:
+            raise RuntimeError("Failed to fetch collection id after upsert.")
+        collection_id = int(row["id"])
+
+        changes = collection.changes_since_clean(self)
+
+        if changes is not None:
+            # only what changed since the last load/save through this storage
+            for key_name, key_category in changes.deletes:
                 conn.execute(
                     """
-                             INSERT INTO collections (name, name_norm, created_at)
-                             VALUES (?, ?, ?)
-                             ON CONFLICT(name_norm) DO UPDATE SET
-                                name = excluded.name;
-                             """,
-                    (collection_display, collection_normal, now),
+                    DELETE FROM items
+                    WHERE collection_id = ? AND name_norm = ? AND category_norm = ?;
+                    """,
+                    (collection_id, key_name, key_category),
                 )
+            _upsert_items(conn, collection_id, changes.upserts, now)
+        else:
+            # upsert items using a logical key (collection_id, name_norm, category_norm)
+            _upsert_items(conn, collection_id, collection.items, now)
+            _delete_missing_items(conn, collection_id, collection.items)
+
+    def load_checkpoints(self) -> dict[str, str]:
+        rows = (
+            self._connection()
+            .execute("SELECT name_norm, digest FROM migration_checkpoints;")
+            .fetchall()
+        )
+        return {row["name_norm"]: row["digest"] for row in rows}
+
+    def save_checkpoints(self, checkpoints: Mapping[str, str]) -> None:
+        conn = self._connection()
+        now = datetime.utcnow().isoformat()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO migration_checkpoints (name_norm, digest, completed_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name_norm) DO UPDATE SET
+                    digest = excluded.digest,
+                    completed_at = excluded.completed_at;
+                """,
+                ((_norm(name), digest, now) for name, digest in checkpoints.items()),
+            )
+
+    def page_items(
+        self,
+        collection_name: str,
+        after: tuple[str, str] | None = None,
+        limit: int = 100,
+    ) -> list[Item]:
+        """
+        One page of items in load_collection() order.
+
+        'after' is the (category_norm, name_norm) of the last item of the
+        previous page (keyset pagination), so every page is an index seek
+        no matter how deep into the collection it is.
+        """
+        if after is None:
+            after = ("", "")
+            comparison = ">="
+        else:
+            comparison = ">"
+
+        rows = (
+            self._connection()
+            .execute(
+                f"""
+            SELECT id, name, category, quantity, created_at, updated_at
+            FROM items
+            WHERE collection_id = (SELECT id FROM collections WHERE name_norm = ?)
+                AND (category_norm, name_norm) {comparison} (?, ?)
+            ORDER BY category_norm, name_norm
+            LIMIT ?;
+            """,
+                (_norm(collection_name), *after, limit),
+            )
+            .fetchall()
+        )
+        return [_row_to_item(row) for row in rows]
+
+    def iter_items(self, collection_name: str, page_size: int = 500) -> Iterator[Item]:
+        """Stream a collection's items page by page instead of loading them all."""
+        after: tuple[str, str] | None = None
+        while True:
+            page = self.page_items(collection_name, after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            after = (_norm(last.category), _norm(last.name))
+
+    def search(self, collection_name: str, keyword: str, limit: int | None = None) -> list[Item]:
+        """
+        Items whose normalized name contains the normalized keyword, in the
+        same order load_collection() returns them, without loading the rest.
+        """
+        key = _norm(keyword)
+        if not key:
+            return []
+
+        if self._fts and len(key) >= _FTS_MIN_NEEDLE:
+            # FTS narrows to candidates; instr() keeps the result exact
+            candidates = "AND i.rowid IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)"
+            parameters: tuple[object, ...] = ('"' + key.replace('"', '""') + '"',)
+        else:
+            candidates = ""
+            parameters = ()
+
+        rows = (
+            self._connection()
+            .execute(
+                f"""
+            SELECT i.id, i.name, i.category, i.quantity, i.created_at, i.updated_at
+            FROM items i JOIN collections c ON c.id = i.collection_id
+            WHERE c.name_norm = ?
+                {candidates}
+                AND instr(i.name_norm, ?) > 0
+            ORDER BY i.category_norm, i.name_norm
+            LIMIT ?;
+            """,
+                (_norm(collection_name), *parameters, key, -1 if limit is None else limit),
+            )
+            .fetchall()
+        )
+        return [_row_to_item(row) for row in rows]
+
+    def summary_by_category(self, collection_name: str) -> dict[str, int]:
+        """Per-category quantity totals read from category_totals, without loading items."""
+        rows = (
+            self._connection()
+            .execute(
+                """
+            SELECT t.category, t.total
+            FROM category_totals t JOIN collections c ON c.id = t.collection_id
+            WHERE c.name_norm = ?
+            ORDER BY t.category_norm, t.category;
+            """,
+                (_norm(collection_name),),
+            )
+            .fetchall()
+        )
+        return {str(row["category"]): int(row["total"]) for row in rows}
+
+    def get_item(self, collection_name: str, name: str, category: str) -> Item | None:
+        conn = self._connection()
+        row = conn.execute(
+            """
+            SELECT i.id, i.name, i.category, i.quantity, i.created_at, i.updated_at
+            FROM items i JOIN collections c ON c.id = i.collection_id
+            WHERE c.name_norm = ? AND i.name_norm = ? AND i.category_norm = ?;
+            """,
+            (_norm(collection_name), _norm(name), _norm(category)),
+        ).fetchone()
+        return None if row is None else _row_to_item(row)
+
+    def upsert_item(self, collection_name: str, item: Item) -> None:
+        conn = self._connection()
+        now = datetime.utcnow().isoformat()
+
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO collections (name, name_norm, created_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name_norm) DO NOTHING;
+                """,
+                (_clean_display(collection_name), _norm(collection_name), now),
+            )
+            collection_id = _collection_id(conn, collection_name)
+            if collection_id is None:
+                raise RuntimeError("Failed to fetch collection id after upsert.")
+            _upsert_items(conn, collection_id, [item], now)
+
+    def delete_item(self, collection_name: str, name: str, category: str) -> bool:
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM items
+                WHERE collection_id = (SELECT id FROM collections WHERE name_norm = ?)
+                    AND name_norm = ? AND category_norm = ?;
+                """,
+                (_norm(collection_name), _norm(name), _norm(category)),
+            )
+        return cursor.rowcount > 0
+
+    def adjust_quantity(
+        self, collection_name: str, name: str, category: str, delta: int
+    ) -> int | None:
+        conn = self._connection()
+        key = (_norm(collection_name), _norm(name), _norm(category))
+
+        with conn:
+            row = conn.execute(
+                """
+                UPDATE items SET quantity = quantity + ?, updated_at = ?
+                WHERE collection_id = (SELECT id FROM collections WHERE name_norm = ?)
+                    AND name_norm = ? AND category_norm = ?
+                    AND quantity + ? > 0
+                RETURNING quantity;
+                """,
+                (delta, datetime.utcnow().isoformat(), *key, delta),
+            ).fetchone()
+            if row is not None:
+                return int(row["quantity"])
 
-                row = conn.execute(
-                    "SELECT id FROM collections WHERE name_norm = ?;",
-                    (collection_normal,),
-                ).fetchone()
-
-                if row is None:
-                    raise RuntimeError("Failed to fetch collection id after upsert.")
-                collection_id = int(row["id"])
-
-                # upsert items using a logical key (collection_id, name_norm, category_norm)
-                for item in collection.items:
-                    name_display = _clean_display(item.name)
-                    category_display = _clean_display(item.category)
-                    name_norm = _norm(item.name)
-                    category_norm = _norm(item.category)
-
-                    conn.execute(
-                        """
-                        INSERT INTO items (
-                            id, collection_id,
-                            name, name_norm,
-                            category, category_norm,
-                            quantity, created_at, updated_at
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(collection_id, name_norm, category_norm) DO UPDATE SET
-                            name = excluded.name,
-                            category = excluded.category,
-                            quantity = excluded.quantity,
-                            updated_at = ?;
-                        """,
-                        (
-                            str(item.id),
-                            collection_id,
-                            name_display,
-                            name_norm,
-                            category_display,
-                            category_norm,
-                            int(item.quantity),
-                            item.created_at.isoformat(),
-                            item.updated_at.isoformat() if item.updated_at else None,
-                            now,
-                        ),
-                    )
-
-                # delete database rows that are no longer in memory
-                pairs = [(_norm(i.name), _norm(i.category)) for i in collection.items]
-
-                if not pairs:
-                    conn.execute(
-                        "DELETE FROM items WHERE collection_id = ?;",
-                        (collection_id,),
-                    )
-                else:
-                    placeholders = ",".join(["(?, ?)"] * len(pairs))
-                    parameters: list[object] = [collection_id]
-
-                    for nam_nor, cat_nor in pairs:
-                        parameters.extend([nam_nor, cat_nor])
-
-                    conn.execute(
-                        f"""
-                        DELETE FROM items
-                        WHERE collection_id = ?
-                            AND (name_norm, category_norm) NOT IN ({placeholders});
-                        """,
-                        parameters,
-                    )
-        finally:
-            conn.close()
+            # either missing or the adjustment empties it
+            cursor = conn.execute(
+                """
+                DELETE FROM items
+                WHERE collection_id = (SELECT id FROM collections WHERE name_norm = ?)
+                    AND name_norm = ? AND category_norm = ?;
+                """,
+                key,
+            )
+        return 0 if cursor.rowcount > 0 else None
+
+
+def _row_to_item(row: sqlite3.Row) -> Item:
+    updated_raw = row["updated_at"]
+    return Item(
+        id=UUID(str(row["id"])),
+        name=str(row["name"]),
+        category=str(row["category"]),
+        quantity=int(row["quantity"]),
+        created_at=_parse_datetime(str(row["created_at"])),
+        updated_at=_parse_datetime(str(updated_raw)) if updated_raw is not None else None,
+    )
+
+
+def _collection_id(conn: sqlite3.Connection, name: str) -> int | None:
+    row = conn.execute(
+        "SELECT id FROM collections WHERE name_norm = ?;",
+        (_norm(name),),
+    ).fetchone()
+    return None if row is None else int(row["id"])
+
+
+def _delete_missing_items(
+    conn: sqlite3.Connection, collection_id: int, items: Iterable[Item]
+) -> None:
+    # delete database rows that are no longer in memory: stage the in-memory
+    # keys in a temp table and anti-join against it, so the statement needs a
+    # constant number of bound parameters no matter how big the collection is
+    conn.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS save_keys(
+            name_norm       TEXT NOT NULL,
+            category_norm   TEXT NOT NULL,
+            PRIMARY KEY (name_norm, category_norm)
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.execute("DELETE FROM temp.save_keys;")
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp.save_keys (name_norm, category_norm) VALUES (?, ?);",
+        ((_norm(i.name), _norm(i.category)) for i in items),
+    )
+    conn.execute(
+        """
+        DELETE FROM items
+        WHERE collection_id = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM temp.save_keys k
+                WHERE k.name_norm = items.name_norm AND k.category_norm = items.category_norm
+            );
+        """,
+        (collection_id,),
+    )
+    conn.execute("DELETE FROM temp.save_keys;")
+
+
+def _upsert_items(
+    conn: sqlite3.Connection, collection_id: int, items: Iterable[Item], now: str
+) -> None:
+    conn.executemany(
+        """
+        INSERT INTO items (
+            id, collection_id,
+            name, name_norm,
+            category, category_norm,
+            quantity, created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(collection_id, name_norm, category_norm) DO UPDATE SET
+            name = excluded.name,
+            category = excluded.category,
+            quantity = excluded.quantity,
+            updated_at = ?;
+        """,
+        (
+            (
+                str(item.id),
+                collection_id,
+                _clean_display(item.name),
+                _norm(item.name),
+                _clean_display(item.category),
+                _norm(item.category),
+                int(item.quantity),
+                item.created_at.isoformat(),
+                item.updated_at.isoformat() if item.updated_at else None,
+                now,
+            )
+            for item in items
+        ),
+    )
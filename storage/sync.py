@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import NamedTuple
+
+from domain import Collection, Item, ItemKey, item_key
+from storage.base import Storage, StreamingStorage
+from storage.migrate import DEFAULT_JOBS
+
+_MASK = (1 << 64) - 1
+
+
+class Fingerprint(NamedTuple):
+    """Item count plus an order-independent hash of the normalized items."""
+
+    items: int
+    digest: int
+
+
+@dataclass
+class SyncPlan:
+    """Source collections whose destination copy differs, and those that match."""
+
+    changed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SyncResult:
+    collections: int = 0
+    upserted: int = 0  # items added to or updated in the destination
+    deleted: int = 0  # destination items the source no longer has
+
+
+def fingerprint(items: Iterable[Item]) -> Fingerprint:
+    """
+    Fingerprint of (name, category, quantity), normalized like item keys.
+
+    Per-item hashes are summed modulo 2**64, so one pass in any order gives
+    the same value and nothing needs to be sorted or held in memory.
+    """
+    count = 0
+    digest = 0
+    for item in items:
+        name, category = item_key(item)
+        data = f"{name}\x1f{category}\x1f{item.quantity}".encode()
+        digest = (digest + int.from_bytes(hashlib.blake2b(data, digest_size=8).digest())) & _MASK
+        count += 1
+    return Fingerprint(count, digest)
+
+
+def stored_fingerprint(storage: Storage, name: str) -> Fingerprint:
+    """Fingerprint a stored collection, streaming it where the backend can."""
+    if isinstance(storage, StreamingStorage):
+        return fingerprint(storage.iter_items(name))
+    return fingerprint(storage.load_collection(name).items)
+
+
+def plan_sync(
+    source: Storage,
+    destination: Storage,
+    names: Iterable[str] | None = None,
+    jobs: int = DEFAULT_JOBS,
+) -> SyncPlan:
+    """
+    Compare fingerprints of the named collections (default: every source
+    collection) on both sides, 'jobs' collections at a time.
+
+    A collection the destination doesn't have fingerprints as empty, so it
+    only counts as changed if the source copy has items.
+    """
+    names = list(source.list_collections()) if names is None else _unique(names)
+
+    def differs(name: str) -> bool:
+        return stored_fingerprint(source, name) != stored_fingerprint(destination, name)
+
+    plan = SyncPlan()
+    with ThreadPoolExecutor(max_workers=max(jobs, 1), thread_name_prefix="sync-scan") as pool:
+        for name, changed in zip(names, pool.map(differs, names), strict=True):
+            (plan.changed if changed else plan.unchanged).append(name)
+    return plan
+
+
+def sync_collections(source: Storage, destination: Storage, names: Iterable[str]) -> SyncResult:
+    """
+    Make the destination copies of the named collections match the source.
+
+    Only differing items are touched: the destination copy is loaded, edited
+    in place and saved, so backends with delta saves (SQLite, journaled JSON)
+    write just those rows. Item ids and created_at in the destination are
+    kept. Destination collections are never deleted.
+    """
+    result = SyncResult()
+    for name in names:
+        collection = source.load_collection(name)
+        # by the stored name, so a new destination copy gets its spelling
+        target = destination.load_collection(collection.name)
+        upserted, deleted = _reconcile(collection, target)
+        if upserted or deleted:
+            destination.save_collection(target)
+        result.collections += 1
+        result.upserted += upserted
+        result.deleted += deleted
+    return result
+
+
+def _reconcile(source: Collection, target: Collection) -> tuple[int, int]:
+    now = datetime.utcnow()
+    upserted = 0
+    wanted: set[ItemKey] = set()
+
+    for item in source.items:
+        key = item_key(item)
+        wanted.add(key)
+        existing = target.find(*key)
+        if existing is None:
+            target.append(
+                Item(
+                    id=item.id,
+                    name=item.name,
+                    category=item.category,
+                    quantity=item.quantity,
+                    created_at=item.created_at,
+                    updated_at=item.updated_at,
+                )
+            )
+            upserted += 1
+        elif existing.quantity != item.quantity:
+            target.update_quantity(existing, item.quantity, item.updated_at or now)
+            upserted += 1
+
+    stale = [item for item in target.items if item_key(item) not in wanted]
+    for item in stale:
+        target.remove(item)
+
+    return upserted, len(stale)
+
+
+def _unique(names: Iterable[str]) -> list[str]:
+    seen: set[str] = set()
+    unique: list[str] = []
+    for name in names:
+        if _norm(name) not in seen:
+            seen.add(_norm(name))
+            unique.append(name)
+    return unique
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
@@ -0,0 +1,147 @@
+from datetime import UTC, datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from domain import Collection, Item
+from services import CollectionService
+from storage.base import StreamingStorage
+from storage.binary_storage import RECORD, SUFFIX, BinaryStorage
+from storage.json_storage import JsonStorage
+from storage.migrate import migrate_all
+from storage.sqlite_storage import SQLiteStorage
+
+
+def make_items() -> list[Item]:
+    return [
+        Item(
+            id=uuid4(),
+            name="Padron 1964 Añejo",
+            category="Cigar",
+            quantity=2,
+            created_at=datetime(2024, 1, 2, 3, 4, 5, 678901),
+            updated_at=datetime(2024, 2, 1, 0, 0, 0),
+        ),
+        Item(
+            id=uuid4(),
+            name="Gyokuro ☕",
+            category="Tea",
+            quantity=10,
+            created_at=datetime(1969, 12, 31, 23, 59, 59, 999999),
+        ),
+        Item(
+            id=uuid4(),
+            name="Oolong",
+            category="Tea",
+            quantity=1,
+            created_at=datetime(2024, 3, 1, 12, 0, tzinfo=UTC),
+        ),
+    ]
+
+
+def test_save_then_load_roundtrip(tmp_path: Path) -> None:
+    storage = BinaryStorage(tmp_path)
+    items = make_items()
+
+    storage.save_collection(Collection(name="My Stash", items=items))
+    loaded = storage.load_collection("my stash")
+
+    assert loaded.name == "My Stash"
+    assert loaded.items == items
+    assert loaded.items[2].created_at.tzinfo is not None
+    assert storage.list_collections() == ["My Stash"]
+    assert storage.load_collection("missing").items == []
+
+
+def test_view_decodes_items_lazily(tmp_path: Path) -> None:
+    storage = BinaryStorage(tmp_path)
+    items = make_items() * 100
+    storage.save_collection(Collection(name="Stash", items=items))
+
+    view = storage.view("Stash")
+    assert view is not None
+    with view:
+        assert len(view) == len(items)
+        assert view[-1] == items[-1]
+        assert view[5:8] == items[5:8]
+        with pytest.raises(IndexError):
+            view[len(items)]
+
+    assert isinstance(storage, StreamingStorage)
+    assert list(storage.iter_items("Stash")) == items
+
+    # three distinct names, two categories and the collection name: the
+    # strings are stored once, the rest is fixed-width records
+    size = (tmp_path / f"stash{SUFFIX}").stat().st_size
+    assert size < len(items) * RECORD.size + 1024
+
+
+def test_unchanged_collection_is_not_rewritten(tmp_path: Path) -> None:
+    storage = BinaryStorage(tmp_path)
+    storage.save_collection(Collection(name="Stash", items=make_items()))
+    path = tmp_path / f"stash{SUFFIX}"
+
+    collection = storage.load_collection("Stash")
+    before = path.stat().st_mtime_ns
+    storage.save_collection(collection)
+    assert path.stat().st_mtime_ns == before
+
+    CollectionService(storage).add_item(collection, "Oolong", "Tea", 4)
+    storage.save_collection(collection)
+    assert storage.load_collection("Stash").find("oolong", "tea").quantity == 5
+
+
+def test_corrupted_files_are_skipped_when_listing(tmp_path: Path) -> None:
+    storage = BinaryStorage(tmp_path)
+    storage.save_collection(Collection(name="Stash", items=make_items()))
+    (tmp_path / f"broken{SUFFIX}").write_bytes(b"CURB\x01")
+    (tmp_path / f"other{SUFFIX}").write_bytes(b"not a collection file at all, no sir")
+
+    assert storage.list_collections() == ["Stash"]
+
+
+def test_migrate_round_trip_through_every_backend(tmp_path: Path) -> None:
+    json_storage = JsonStorage(tmp_path / "json")
+    binary = BinaryStorage(tmp_path / "binary")
+    sqlite = SQLiteStorage(tmp_path / "curation.db")
+    json_back = JsonStorage(tmp_path / "json-back")
+
+    originals = [
+        Collection(name="Cigars", items=make_items()[:1]),
+        Collection(name="Tea", items=make_items()[1:2]),
+    ]
+    for collection in originals:
+        json_storage.save_collection(collection)
+
+    assert migrate_all(json_storage, binary) == 2
+    assert migrate_all(binary, sqlite) == 2
+    assert migrate_all(sqlite, binary) == 2
+    assert migrate_all(binary, json_back) == 2
+
+    for collection in originals:
+        assert json_back.load_collection(collection.name).items == collection.items
+        assert binary.load_collection(collection.name).items == collection.items
+
+
+def test_direct_item_edits_are_saved(tmp_path: Path) -> None:
+    storage = BinaryStorage(tmp_path)
+    storage.save_collection(
+        Collection(
+            name="Tea",
+            items=[
+                Item(id=uuid4(), name="Sencha", category="Green", quantity=1),
+                Item(id=uuid4(), name="Assam", category="Black", quantity=1),
+            ],
+        )
+    )
+
+    collection = storage.load_collection("tea")
+    collection.items[0].quantity = 99
+    collection.items[1] = Item(id=uuid4(), name="Oolong", category="Blue", quantity=3)
+    expected = sorted((i.name, i.quantity) for i in collection.items)
+    storage.save_collection(collection)
+
+    loaded = storage.load_collection("tea")
+    assert sorted((i.name, i.quantity) for i in loaded.items) == expected
+    assert (collection.items[0].name, 99) in expected
@@ -0,0 +1,251 @@
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from domain import Collection, Item
+from services import CollectionService
+from storage.base import (
+    BatchSavingStorage,
+    CheckpointStorage,
+    ItemStorage,
+    SearchableStorage,
+    StreamingStorage,
+    SummarizingStorage,
+)
+from storage.caching import CachingStorage
+from storage.json_storage import JsonStorage
+from storage.migrate import migrate_collections
+from storage.sqlite_storage import SQLiteStorage
+
+
+class CountingStorage:
+    """In-memory Storage that records calls, standing in for a real backend."""
+
+    def __init__(self) -> None:
+        self.saved: dict[str, Collection] = {}
+        self.loads = 0
+        self.saves = 0
+        self.closed = False
+
+    def list_collections(self) -> list[str]:
+        return [c.name for c in self.saved.values()]
+
+    def load_collection(self, name: str) -> Collection:
+        self.loads += 1
+        stored = self.saved.get(name.strip().casefold())
+        if stored is None:
+            return Collection(name=name)
+        return Collection(name=stored.name, items=list(stored.items))
+
+    def save_collection(self, collection: Collection) -> None:
+        self.saves += 1
+        self.saved[collection.name.strip().casefold()] = Collection(
+            name=collection.name, items=list(collection.items)
+        )
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_collection(name: str, count: int = 3) -> Collection:
+    return Collection(
+        name=name,
+        items=[
+            Item(id=uuid4(), name=f"Item {i}", category="Misc", quantity=i + 1)
+            for i in range(count)
+        ],
+    )
+
+
+def test_loads_are_served_from_memory_as_copies() -> None:
+    inner = CountingStorage()
+    inner.save_collection(make_collection("Cigars"))
+    storage = CachingStorage(inner)
+
+    first = storage.load_collection("Cigars")
+    first.items[0].quantity = 99
+    first.items.pop()
+    second = storage.load_collection("cigars")
+
+    assert inner.loads == 1
+    assert len(second.items) == 3
+    assert second.items[0].quantity == 1
+    assert storage.cache_info()[:2] == (1, 1)
+
+
+def test_write_through_saves_immediately() -> None:
+    inner = CountingStorage()
+    storage = CachingStorage(inner)
+
+    storage.save_collection(make_collection("Tea"))
+
+    assert inner.saves == 1
+    assert storage.load_collection("Tea").items == inner.saved["tea"].items
+    assert inner.loads == 0
+
+
+def test_write_back_defers_saves_until_flush() -> None:
+    inner = CountingStorage()
+    storage = CachingStorage(inner, mode="write-back")
+
+    collection = make_collection("Tea")
+    storage.save_collection(collection)
+    storage.save_collection(collection)
+
+    assert inner.saves == 0
+    assert storage.list_collections() == ["Tea"]
+    assert storage.load_collection("Tea").items == collection.items
+
+    storage.close()
+    assert inner.saves == 1
+    assert inner.saved["tea"].items == collection.items
+
+
+def test_lru_eviction_respects_the_byte_budget_and_flushes_dirty_entries() -> None:
+    inner = CountingStorage()
+    storage = CachingStorage(inner, mode="write-back", max_bytes=10_000)
+
+    for name in ("a", "b", "c", "d", "e"):
+        storage.save_collection(make_collection(name, count=5))
+
+    info = storage.cache_info()
+    assert info.current_bytes <= 10_000
+    assert info.collections == 3
+    # the least recently used were written out when evicted, not dropped
+    assert set(inner.saved) == {"a", "b"}
+    storage.flush()
+    assert set(inner.saved) == {"a", "b", "c", "d", "e"}
+
+
+def test_invalidate_rereads_from_the_inner_storage() -> None:
+    inner = CountingStorage()
+    inner.save_collection(make_collection("Cigars"))
+    storage = CachingStorage(inner)
+    storage.load_collection("Cigars")
+
+    inner.save_collection(make_collection("Cigars", count=1))
+    assert len(storage.load_collection("Cigars").items) == 3
+
+    storage.invalidate("CIGARS")
+    assert len(storage.load_collection("Cigars").items) == 1
+    assert inner.loads == 2
+
+
+def test_unknown_mode_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        CachingStorage(CountingStorage(), mode="write-around")
+
+
+def test_search_summary_and_streaming_answer_from_cached_collections() -> None:
+    inner = CountingStorage()
+    storage = CachingStorage(inner, mode="write-back")
+    assert isinstance(storage, SearchableStorage)
+    assert isinstance(storage, SummarizingStorage)
+    assert isinstance(storage, StreamingStorage)
+
+    storage.save_collection(make_collection("Cigars"))
+    assert [i.name for i in storage.search("cigars", "ITEM 1")] == ["Item 1"]
+    assert storage.summary_by_category("Cigars") == {"Misc": 6}
+    assert [i.quantity for i in storage.iter_items("Cigars")] == [1, 2, 3]
+    assert (inner.loads, inner.saves) == (0, 0)
+
+    # not cached: the inner storage lacks these, so they load through the cache
+    inner.save_collection(make_collection("Tea", count=2))
+    assert storage.summary_by_category("tea") == {"Misc": 3}
+    assert [i.name for i in storage.search("tea", "item", limit=1)] == ["Item 0"]
+    assert inner.loads == 1
+
+
+def test_item_writes_without_inner_item_ops_go_through_the_cache() -> None:
+    inner = CountingStorage()
+    inner.save_collection(make_collection("Cigars"))
+    storage = CachingStorage(inner, mode="write-back")
+    assert isinstance(storage, ItemStorage)
+
+    assert storage.adjust_quantity("cigars", "item 0", "misc", 4) == 5
+    assert storage.delete_item("Cigars", "Item 1", "Misc")
+    assert inner.saves == 1
+
+    storage.flush()
+    assert [i.quantity for i in inner.load_collection("cigars").items] == [5, 3]
+
+
+@pytest.mark.parametrize("mode", ["write-through", "write-back"])
+def test_item_writes_reach_inner_item_ops_and_refresh_the_cache(tmp_path: Path, mode: str) -> None:
+    inner = SQLiteStorage(tmp_path / "c.db")
+    storage = CachingStorage(inner, mode=mode)
+    collection = make_collection("Cigars")
+    storage.save_collection(collection)
+    cached = storage.load_collection("Cigars")
+    assert storage.get_item("Cigars", "item 2", "MISC") == cached.items[2]
+
+    padron = Item(id=uuid4(), name="Padron", category="Cigar", quantity=2)
+    storage.upsert_item("Cigars", padron)
+    assert storage.adjust_quantity("cigars", "Item 0", "Misc", 1) == 2
+
+    # pending write-back changes were flushed first, not lost
+    expected = [(i.name, i.quantity) for i in inner.load_collection("Cigars").items]
+    assert sorted(expected) == [("Item 0", 2), ("Item 1", 2), ("Item 2", 3), ("Padron", 2)]
+    assert [(i.name, i.quantity) for i in storage.load_collection("Cigars").items] == expected
+    assert storage.get_item("Cigars", "padron", "cigar") == padron
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_wraps_real_backends_and_keeps_delta_saves(tmp_path: Path, backend: str) -> None:
+    inner = JsonStorage(tmp_path) if backend == "json" else SQLiteStorage(tmp_path / "c.db")
+    storage = CachingStorage(inner)
+    service = CollectionService(storage)
+    storage.save_collection(make_collection("Cigars", count=50))
+
+    collection = service.load("Cigars")
+    assert collection.changes_since_clean(inner) is not None
+
+    service.add_item(collection, "Padron 1964", "Cigar", 2)
+    service.save(collection)
+
+    storage.invalidate()
+    assert service.load("Cigars").items == inner.load_collection("cigars").items
+    assert service.summary_by_category("Cigars") == {"Misc": sum(range(1, 51)), "Cigar": 2}
+
+
+def test_close_flushes_then_closes_the_inner_storage() -> None:
+    inner = CountingStorage()
+    storage = CachingStorage(inner, mode="write-back")
+    storage.save_collection(make_collection("Cigars"))
+
+    with storage:
+        assert inner.saves == 0
+    assert inner.saves == 1 and inner.closed
+
+
+def test_migrations_keep_batches_and_checkpoints_of_the_inner_storage(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = CountingStorage()
+    for name in ("Cigars", "Tea", "Lab"):
+        source.save_collection(make_collection(name))
+    inner = SQLiteStorage(tmp_path / "c.db")
+    storage = CachingStorage(inner)
+    assert isinstance(storage, BatchSavingStorage) and isinstance(storage, CheckpointStorage)
+
+    batches: list[int] = []
+    save_collections = inner.save_collections
+
+    def counting_save_collections(collections: list[Collection]) -> None:
+        batches.append(len(collections))
+        save_collections(collections)
+
+    monkeypatch.setattr(inner, "save_collections", counting_save_collections)
+
+    names = list(source.list_collections())
+    assert migrate_collections(source, storage, names) == 3
+    assert batches == [3]
+    assert sorted(inner.load_checkpoints()) == ["cigars", "lab", "tea"]
+    assert migrate_collections(source, storage, names, resume=True) == 0
+    assert storage.load_collection("tea").items == source.saved["tea"].items
+
+    # without checkpoint support in the inner storage there is nothing to resume from
+    plain = CachingStorage(CountingStorage())
+    plain.save_checkpoints({"Tea": "digest"})
+    assert plain.load_checkpoints() == {}
@@ -1,8 +1,14 @@
+import sys
 from pathlib import Path
+from uuid import uuid4
 
-from cli import make_storage
+import pytest
+
+from cli import compression_level, main, make_storage, positive_int
+from domain import Collection, Item
+from storage.binary_storage import BinaryStorage
 from storage.json_storage import JsonStorage
-from storage.sqlite_storage import SQLiteStorage
+from storage.sqlite_storage import PROFILES, SQLiteStorage
 
 
 def test_make_storage_json(tmp_path: Path) -> None:
@@ -13,3 +19,203 @@ def test_make_storage_json(tmp_path: Path) -> None:
 def test_make_storage_sqlite(tmp_path: Path) -> None:
     storage = make_storage("sqlite", str(tmp_path / "curation.db"))
     assert isinstance(storage, SQLiteStorage)
+
+
+def test_make_storage_sqlite_profile(tmp_path: Path) -> None:
+    storage = make_storage("sqlite", str(tmp_path / "curation.db"), sqlite_profile="throughput")
+    assert isinstance(storage, SQLiteStorage)
+    assert storage._profile == PROFILES["throughput"]
+
+
+def test_make_storage_json_journal(tmp_path: Path) -> None:
+    storage = make_storage(
+        "json", str(tmp_path / "x.db"), str(tmp_path), json_journal=True, json_durability="group"
+    )
+    assert isinstance(storage, JsonStorage)
+    assert storage._journal
+    assert storage._durability == "group"
+
+
+def test_make_storage_json_compression(tmp_path: Path) -> None:
+    storage = make_storage("json", str(tmp_path / "x.db"), str(tmp_path), json_compression="lzma")
+    assert isinstance(storage, JsonStorage)
+    assert storage._compression == "lzma"
+
+
+def test_make_storage_binary(tmp_path: Path) -> None:
+    storage = make_storage("binary", str(tmp_path / "x.db"), binary_dir=str(tmp_path))
+    assert isinstance(storage, BinaryStorage)
+
+
+def test_positive_int_accepts_counts_from_one() -> None:
+    assert positive_int("1") == 1
+    assert positive_int("8") == 8
+
+
+@pytest.mark.parametrize("jobs", ["0", "-2", "two"])
+def test_migrate_rejects_jobs_below_one(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], jobs: str
+) -> None:
+    argv = ["cli.py", "--migrate", "--json-dir", str(tmp_path), "--db", str(tmp_path / "c.db")]
+    monkeypatch.setattr(sys, "argv", [*argv, "--jobs", jobs])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_group_durability_requires_the_journal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    argv = ["cli.py", "--migrate", "--json-dir", str(tmp_path), "--db", str(tmp_path / "c.db")]
+    monkeypatch.setattr(sys, "argv", [*argv, "--json-durability", "group"])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+    assert "--json-journal" in capsys.readouterr().err
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--json-durability", "group", "--json-journal"])
+    main()
+    assert "Migrated" in capsys.readouterr().out
+
+
+def test_compression_level_accepts_zero_to_nine() -> None:
+    assert compression_level("0") == 0
+    assert compression_level("9") == 9
+
+
+@pytest.mark.parametrize(
+    "flags",
+    [
+        ["--json-compression", "gzip", "--json-compression-level", "10"],
+        ["--json-compression", "gzip", "--json-compression-level", "-1"],
+        ["--json-compression", "gzip", "--json-compression-level", "max"],
+        ["--json-compression-level", "5"],
+    ],
+)
+def test_migrate_rejects_bad_compression_levels(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    flags: list[str],
+) -> None:
+    argv = ["cli.py", "--migrate", "--json-dir", str(tmp_path), "--db", str(tmp_path / "c.db")]
+    monkeypatch.setattr(sys, "argv", [*argv, *flags])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+    assert "--json-compression" in capsys.readouterr().err
+
+
+def test_migrate_reports_migrated_skipped_and_missing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_dir = tmp_path / "json"
+    source = JsonStorage(json_dir)
+    for name in ("Cigars", "Tea"):
+        source.save_collection(Collection(name=name))
+    SQLiteStorage(tmp_path / "c.db").save_collection(Collection(name="Tea"))
+
+    argv = ["cli.py", "--migrate", "--json-dir", str(json_dir), "--db", str(tmp_path / "c.db")]
+    only = ["--only", "cigars", "--only", "tea", "--only", "coffee"]
+
+    monkeypatch.setattr(sys, "argv", [*argv, *only, "--dry-run"])
+    main()
+    assert capsys.readouterr().out == (
+        "Would migrate 1 collection(s): cigars\n"
+        "Skipped 1 (exists). Missing 1.\n"
+        "Missing (not found in source): coffee\n"
+    )
+
+    monkeypatch.setattr(sys, "argv", [*argv, *only, "--jobs", "2"])
+    main()
+    assert capsys.readouterr().out == (
+        "Migrated 1 collection(s). Skipped 1 (exists). Missing 1.\n"
+        "Missing (not found in source): coffee\n"
+    )
+    assert SQLiteStorage(tmp_path / "c.db").list_collections() == ["Cigars", "Tea"]
+
+
+def test_migrate_resume_reports_completed_collections(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_dir = tmp_path / "json"
+    source = JsonStorage(json_dir)
+    for name in ("Cigars", "Tea"):
+        source.save_collection(Collection(name=name))
+
+    argv = ["cli.py", "--migrate", "--json-dir", str(json_dir), "--db", str(tmp_path / "c.db")]
+    monkeypatch.setattr(sys, "argv", [*argv, "--only", "tea"])
+    main()
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--resume"])
+    main()
+    captured = capsys.readouterr()
+    assert captured.out == (
+        "Resumed: 1 collection(s) already complete.\n"
+        "Migrated 1 collection(s). Skipped 0 (exists). Missing 0.\n"
+    )
+    assert "2/2 collection(s)" in captured.err
+
+
+def test_migrate_resume_keeps_collections_it_never_wrote(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_dir = tmp_path / "json"
+    source = JsonStorage(json_dir)
+    for name in ("Cigars", "Tea"):
+        source.save_collection(Collection(name=name))
+    SQLiteStorage(tmp_path / "c.db").save_collection(
+        Collection(
+            name="Tea", items=[Item(id=uuid4(), name="Precious", category="Oolong", quantity=9)]
+        )
+    )
+
+    argv = ["cli.py", "--migrate", "--json-dir", str(json_dir), "--db", str(tmp_path / "c.db")]
+    monkeypatch.setattr(sys, "argv", [*argv, "--only", "cigars"])
+    main()
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--resume"])
+    main()
+    assert capsys.readouterr().out == (
+        "Resumed: 1 collection(s) already complete.\n"
+        "Migrated 0 collection(s). Skipped 1 (exists). Missing 0.\n"
+    )
+    tea = SQLiteStorage(tmp_path / "c.db").load_collection("Tea")
+    assert [(i.name, i.quantity) for i in tea.items] == [("Precious", 9)]
+
+
+def test_sync_reports_changed_and_unchanged(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_dir = tmp_path / "json"
+    source = JsonStorage(json_dir)
+    tea = Collection(
+        name="Tea", items=[Item(id=uuid4(), name="Sencha", category="Green", quantity=1)]
+    )
+    source.save_collection(tea)
+    source.save_collection(
+        Collection(
+            name="Cigars", items=[Item(id=uuid4(), name="Padron", category="Cigar", quantity=2)]
+        )
+    )
+    SQLiteStorage(tmp_path / "c.db").save_collection(tea)
+
+    argv = ["cli.py", "--sync", "--json-dir", str(json_dir), "--db", str(tmp_path / "c.db")]
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--dry-run"])
+    main()
+    assert (
+        capsys.readouterr().out == "Would sync 1 collection(s): Cigars\nUnchanged 1. Missing 0.\n"
+    )
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--only", "cigars", "--only", "coffee"])
+    main()
+    assert capsys.readouterr().out == (
+        "Synced 1 collection(s): 1 item(s) written, 0 removed.\n"
+        "Unchanged 0. Missing 1.\n"
+        "Missing (not found in source): coffee\n"
+    )
+    assert SQLiteStorage(tmp_path / "c.db").list_collections() == ["Cigars", "Tea"]
@@ -1,5 +1,8 @@
-from domain import Collection
-from services import CollectionService
+import random
+from uuid import uuid4
+
+from domain import ChangeSet, Collection, Item
+from services import BatchOperation, CollectionService
 
 
 def make_service() -> CollectionService:
@@ -421,3 +424,334 @@ def test_search_empty_keyword_returns_empty_list():
 
     assert service.search(collection, "") == []
     assert service.search(collection, "     ") == []
+
+
+def test_collection_find_uses_normalized_key():
+    collection = Collection(name="test")
+    service = make_service()
+
+    service.add_item(collection, "  Padron X000 ", " CIGAR ", 2)
+
+    item = collection.find("padron x000", "cigar")
+
+    assert item is not None
+    assert item.name == "Padron X000"
+    assert collection.find("padron x000", "tea") is None
+
+
+def test_collection_index_survives_remove_and_reassignment():
+    collection = Collection(name="test")
+    service = make_service()
+
+    for n in range(5):
+        service.add_item(collection, f"Item {n}", "cat", 1)
+
+    service.remove_item(collection, "Item 1", "cat", 1)
+    service.set_quantity(collection, "Item 3", "cat", 0)
+
+    assert [i.name for i in collection.items] == ["Item 0", "Item 2", "Item 4"]
+    for name in ("item 0", "item 2", "item 4"):
+        assert collection.find(name, "cat").name.casefold() == name
+
+    # replacing the list directly must not leave a stale index behind
+    collection.items = [collection.items[0]]
+    assert collection.find("item 2", "cat") is None
+    assert collection.find(_norm(collection.items[0].name), "cat") is collection.items[0]
+
+
+def test_remove_keeps_the_order_of_the_remaining_items():
+    collection = Collection(name="test")
+    service = make_service()
+    for n in range(10):
+        service.add_item(collection, f"Padron {n}", "Cigar", 1)
+    held = collection.items
+
+    for n in (0, 3, 4, 9):
+        service.remove_item(collection, f"Padron {n}", "Cigar", 1)
+    expected = ["Padron 1", "Padron 2", "Padron 5", "Padron 6", "Padron 7", "Padron 8"]
+    # a view held from before sees the removals without 'items' being read again
+    assert [i.name for i in held] == expected
+    assert len(held) == 6 and held[0].name == "Padron 1" and held[-1].name == "Padron 8"
+
+    service.add_item(collection, "Padron 10", "Cigar", 1)
+    assert [i.name for i in held] == [*expected, "Padron 10"]
+    assert [i.name for i in service.search(collection, "padron")] == [*expected, "Padron 10"]
+    assert held is collection.items
+    assert collection.is_consistent()
+
+    for name in expected:
+        service.remove_item(collection, name, "Cigar", 1)
+    assert [i.name for i in held] == ["Padron 10"]
+    assert collection.is_consistent()
+
+
+def test_apply_batch_matches_single_item_calls():
+    service = make_service()
+    operations = [
+        BatchOperation("add", "Padron", "Cigar", 2),
+        BatchOperation("add", " padron ", "CIGAR", 3),
+        BatchOperation("add", "Theo", "Lab", 1),
+        BatchOperation("remove", "Theo", "Lab", 1),
+        BatchOperation("remove", "Missing", "Lab", 1),
+        BatchOperation("set", "Padron", "cigar", 7),
+        BatchOperation("add", "   ", "cigar", 1),
+        BatchOperation("set", "Teddy", "Yorkie", 4),
+        BatchOperation("remove", "Teddy", "Yorkie", 1),
+    ]
+
+    expected = Collection(name="test")
+    service.add_item(expected, "Teddy", "Yorkie", 1)
+    for op in operations:
+        if op.op == "add":
+            service.add_item(expected, op.name, op.category, op.quantity)
+        elif op.op == "remove":
+            service.remove_item(expected, op.name, op.category, op.quantity)
+        else:
+            service.set_quantity(expected, op.name, op.category, op.quantity)
+
+    collection = Collection(name="test")
+    service.add_item(collection, "Teddy", "Yorkie", 1)
+    outcomes = service.apply_batch(collection, operations)
+
+    assert outcomes == [
+        "created",
+        "incremented",
+        "created",
+        "deleted",
+        "not_found",
+        "set",
+        "rejected",
+        "set",
+        "decremented",
+    ]
+    assert sorted((i.name, i.category, i.quantity) for i in collection.items) == sorted(
+        (i.name, i.category, i.quantity) for i in expected.items
+    )
+
+
+def test_apply_batch_uses_one_timestamp_and_recreates_deleted_items():
+    service = make_service()
+    collection = Collection(name="test")
+    service.add_item(collection, "Padron", "Cigar", 1)
+    service.add_item(collection, "Trinidad", "Cigar", 1)
+    original_id = collection.find("padron", "cigar").id
+
+    outcomes = service.apply_batch(
+        collection,
+        [
+            BatchOperation("remove", "Padron", "Cigar", 1),
+            BatchOperation("add", "PADRON", "Cigar", 5),
+            BatchOperation("set", "Trinidad", "Cigar", 3),
+            BatchOperation("add", "Oliva", "Cigar", 2),
+        ],
+    )
+
+    assert outcomes == ["deleted", "created", "set", "created"]
+
+    padron = collection.find("padron", "cigar")
+    trinidad = collection.find("trinidad", "cigar")
+    oliva = collection.find("oliva", "cigar")
+
+    assert padron.id != original_id
+    assert (padron.name, padron.quantity) == ("PADRON", 5)
+    assert trinidad.quantity == 3
+    assert padron.created_at == trinidad.updated_at == oliva.created_at
+
+
+def test_category_totals_stay_consistent_through_mutations():
+    rng = random.Random(1234)
+    service = make_service()
+    collection = Collection(name="test")
+
+    names = [f"Item {n}" for n in range(20)]
+    categories = ["Cigar", "cigar", "Tea", "Lab"]
+
+    for _ in range(500):
+        name = rng.choice(names)
+        category = rng.choice(categories)
+        quantity = rng.randint(0, 4)
+        action = rng.choice(("add", "remove", "set", "batch"))
+
+        if action == "add":
+            service.add_item(collection, name, category, quantity)
+        elif action == "remove":
+            service.remove_item(collection, name, category, quantity)
+        elif action == "set":
+            service.set_quantity(collection, name, category, quantity)
+        else:
+            service.apply_batch(
+                collection,
+                [
+                    BatchOperation("add", name, category, quantity),
+                    BatchOperation("remove", name, rng.choice(categories), 1),
+                ],
+            )
+
+        assert collection.is_consistent()
+
+    recomputed: dict[str, int] = {}
+    for item in collection.items:
+        recomputed[item.category] = recomputed.get(item.category, 0) + item.quantity
+    assert service.summary_by_category(collection) == recomputed
+
+
+def test_summary_by_category_sees_direct_field_edits():
+    service = make_service()
+    collection = Collection(name="test")
+    service.add_item(collection, "Padron", "cat", 1)
+    service.add_item(collection, "Oliva", "cat", 2)
+    assert service.summary_by_category(collection) == {"cat": 3}
+
+    collection.items[0].quantity = 100
+    assert service.summary_by_category(collection) == {"cat": 102}
+    assert collection.is_consistent()
+
+    collection.items[1].category = "Tea"
+    service.add_item(collection, "Fuente", "Tea", 1)
+    assert service.summary_by_category(collection) == {"cat": 100, "Tea": 3}
+    assert collection.is_consistent()
+
+
+def test_indexes_see_direct_renames():
+    service = make_service()
+    collection = Collection(name="test")
+    for name in ("Padron", "Oliva", "Fuente"):
+        service.add_item(collection, name, "cat", 1)
+    assert service.search(collection, "padron") and service.complete(collection, "pa", 5)
+    assert service.fuzzy_search(collection, "padron", 1)
+
+    collection.items[0].name = "Zed"
+    renamed = collection.items[0]
+    assert service.search(collection, "zed") == [renamed]
+    assert service.search(collection, "padron") == []
+    assert service.complete(collection, "ze", 5) == [renamed]
+    assert service.fuzzy_search(collection, "zed", 0) == [renamed]
+    assert collection.find("zed", "cat") is renamed
+    assert collection.find("padron", "cat") is None
+    assert collection.is_consistent()
+
+
+def test_indexed_search_matches_linear_scan_through_mutations():
+    rng = random.Random(99)
+    service = make_service()
+    collection = Collection(name="test")
+    words = ["padron", "fuente", "oliva", "opus", "x000", "1964", "añejo", "STRASSE"]
+
+    def linear(keyword: str) -> list:
+        key = _norm(keyword)
+        return [i for i in collection.items if key in _norm(i.name)]
+
+    for step in range(300):
+        name = " ".join(rng.sample(words, 2))
+        if rng.random() < 0.7:
+            service.add_item(collection, name, rng.choice(["Cigar", "Tea"]), 1)
+        elif collection.items:
+            victim = rng.choice(collection.items)
+            service.remove_item(collection, victim.name, victim.category, victim.quantity)
+
+        if step % 10 == 0:
+            for keyword in ("pa", "padron", "ron fu", "strasse", "Ñej", "zzz", "o"):
+                assert service.search(collection, keyword) == linear(keyword)
+            assert collection.is_consistent()
+
+
+def test_complete_ranks_prefix_matches_by_quantity():
+    service = make_service()
+    collection = Collection(name="test")
+
+    service.add_item(collection, "Padron 1964", "Cigar", 2)
+    service.add_item(collection, "Padron X000", "Cigar", 5)
+    service.add_item(collection, "padron", "Tea", 1)
+    service.add_item(collection, "Oliva", "Cigar", 9)
+
+    assert [i.name for i in service.complete(collection, " PAD", 2)] == [
+        "Padron X000",
+        "Padron 1964",
+    ]
+    assert service.complete(collection, "", 5) == []
+
+    service.set_quantity(collection, "Padron X000", "Cigar", 0)
+    service.add_item(collection, "Padrino", "Cigar", 3)
+
+    assert [i.name for i in service.complete(collection, "pad", 10)] == [
+        "Padrino",
+        "Padron 1964",
+        "padron",
+    ]
+    assert collection.is_consistent()
+
+
+def test_fuzzy_search_tolerates_typos():
+    service = make_service()
+    collection = Collection(name="test")
+
+    service.add_item(collection, "Padron", "Cigar", 1)
+    service.add_item(collection, "Oliva", "Cigar", 1)
+    service.add_item(collection, "Padrino", "Cigar", 1)
+
+    assert [i.name for i in service.fuzzy_search(collection, "PADORN", 2)] == ["Padron"]
+    assert [i.name for i in service.fuzzy_search(collection, "padrn", 3)] == [
+        "Padron",
+        "Padrino",
+    ]
+    assert service.fuzzy_search(collection, "   ", 2) == []
+
+    service.remove_item(collection, "Padron", "Cigar", 1)
+    service.add_item(collection, "Padrón", "Cigar", 1)
+
+    assert [i.name for i in service.fuzzy_search(collection, "padron", 1)] == ["Padrón"]
+    assert collection.is_consistent()
+
+
+def test_changes_since_clean_tracks_service_mutations():
+    service = make_service()
+    owner = object()
+    collection = Collection(name="test")
+    service.add_item(collection, "Padron", "Cigar", 2)
+    service.add_item(collection, "Oliva", "Cigar", 1)
+
+    assert collection.changes_since_clean(owner) is None
+
+    collection.mark_clean(owner)
+    assert collection.changes_since_clean(owner).upserts == []
+
+    service.add_item(collection, "Padron", "Cigar", 1)
+    service.remove_item(collection, "Oliva", "Cigar", 1)
+    changes = collection.changes_since_clean(owner)
+
+    assert [i.name for i in changes.upserts] == ["Padron"]
+    assert changes.deletes == [("oliva", "cigar")]
+    assert collection.changes_since_clean(object()) is None
+
+    # editing the list directly drops the baseline: full save required
+    collection.items.append(collection.items[0])
+    assert collection.changes_since_clean(owner) is None
+
+
+def test_changes_since_clean_sees_direct_edits():
+    service = make_service()
+    owner = object()
+    collection = Collection(name="test")
+    for name in ("Padron", "Oliva", "Fuente"):
+        service.add_item(collection, name, "Cigar", 1)
+    collection.mark_clean(owner)
+
+    # item positions edited through the view: full save required
+    collection.items[1] = Item(id=uuid4(), name="Opus", category="Cigar", quantity=2)
+    assert collection.changes_since_clean(owner) is None
+    collection.mark_clean(owner)
+    assert collection.changes_since_clean(owner) == ChangeSet(upserts=[], deletes=[])
+
+    # Item fields assigned directly: full save required
+    collection.items[0].quantity = 99
+    collection.items[2].name = "Fuente Opus X"
+    assert collection.changes_since_clean(owner) is None
+
+    # the index follows the list and the renamed item
+    assert collection.find("oliva", "cigar") is None
+    assert collection.find("opus", "cigar") is collection.items[1]
+    assert collection.find("fuente opus x", "cigar") is collection.items[2]
+    assert collection.is_consistent()
+
+    collection.mark_clean(owner)
+    assert collection.changes_since_clean(owner) == ChangeSet(upserts=[], deletes=[])
@@ -0,0 +1,78 @@
+from indexes import BKTree, PrefixTrie, TrigramIndex, levenshtein, trigrams
+
+
+def test_trigrams_of_short_text_is_empty():
+    assert trigrams("ab") == set()
+    assert trigrams("abcd") == {"abc", "bcd"}
+
+
+def test_trigram_candidates_superset_of_matches():
+    index: TrigramIndex[str] = TrigramIndex()
+    for text in ("padron 1964", "padron x000", "arturo fuente", "oliva v"):
+        index.add(text, text)
+
+    assert index.candidates("padron") == {"padron 1964", "padron x000"}
+    assert index.candidates("x00") == {"padron x000"}
+    assert index.candidates("zzz") == set()
+    assert index.candidates("pa") is None
+
+
+def test_trigram_discard_removes_empty_postings():
+    index: TrigramIndex[str] = TrigramIndex()
+    index.add("a", "abcd")
+    index.add("b", "bcde")
+    index.discard("a", "abcd")
+
+    fresh: TrigramIndex[str] = TrigramIndex()
+    fresh.add("b", "bcde")
+
+    assert index == fresh
+    assert index.candidates("abc") == set()
+
+
+def test_prefix_trie_lookup_and_prune():
+    trie: PrefixTrie[str] = PrefixTrie()
+    for text in ("pad", "padron", "padron x", "oliva"):
+        trie.add(text, text)
+
+    assert sorted(trie.keys_with_prefix("pad")) == ["pad", "padron", "padron x"]
+    assert trie.keys_with_prefix("q") == []
+
+    trie.discard("padron x", "padron x")
+    trie.discard("padron", "padron")
+
+    assert trie.keys_with_prefix("padr") == []
+    assert sorted(trie.keys_with_prefix("")) == ["oliva", "pad"]
+
+
+def test_levenshtein():
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("padron", "padron") == 0
+
+
+def test_bk_tree_search_matches_brute_force():
+    words = ["padron", "padrone", "paddon", "oliva", "olive", "opus", "fuente", "fuentes"]
+    tree: BKTree[str] = BKTree()
+    for word in words:
+        tree.add(word, word)
+
+    for query in ("padron", "oliv", "fuentez", "xyz"):
+        for k in range(4):
+            expected = sorted(
+                (levenshtein(query, w), w) for w in words if levenshtein(query, w) <= k
+            )
+            assert sorted(tree.search(query, k)) == expected
+
+
+def test_bk_tree_discard_keeps_routing_nodes():
+    tree: BKTree[str] = BKTree()
+    for word in ("book", "books", "cake", "boo"):
+        tree.add(word, word)
+
+    tree.discard("book", "book")
+
+    assert sorted(tree.search("book", 1)) == [(1, "boo"), (1, "books")]
+
+    tree.add("book", "book")
+    assert (0, "book") in tree.search("book", 0)
@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from storage.json_stream import (
+    COMPRESSIONS,
+    CompressedWriter,
+    decompressed,
+    iter_collection,
+    write_collection,
+)
+
+
+def _split(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _items(count: int) -> list[dict[str, object]]:
+    return [
+        {
+            "id": f"id-{i}",
+            "name": f"Café Crème {i} ☕",
+            "category": "Tea",
+            "quantity": 10**i,
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", [0, 1, 5])
+def test_writer_matches_json_dump_indent_2(count: int) -> None:
+    items = _items(count)
+    out = io.StringIO()
+
+    write_collection(out, "Cigars", iter(items))
+
+    assert out.getvalue() == json.dumps({"name": "Cigars", "items": items}, indent=2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64 * 1024])
+def test_reader_roundtrips_across_chunk_boundaries(chunk_size: int) -> None:
+    items = _items(12)
+    data = json.dumps({"name": "Tea é", "items": items}, indent=2).encode("utf-8")
+
+    events = list(iter_collection(_split(data, chunk_size)))
+
+    assert events[0] == ("name", "Tea é")
+    assert [value for key, value in events[1:]] == items
+    assert all(key == "item" for key, _ in events[1:])
+
+
+def test_reader_accepts_any_member_order_and_compact_files() -> None:
+    data = json.dumps({"items": [{"quantity": 7}], "extra": {"a": [1]}, "name": "x"})
+
+    events = list(iter_collection(_split(data.encode(), 4)))
+
+    assert events == [("item", {"quantity": 7}), ("extra", {"a": [1]}), ("name", "x")]
+
+
+@pytest.mark.parametrize("data", [b"", b"[]", b'{"name": "x", "items": [{}', b'{"name" "x"}'])
+def test_reader_rejects_malformed_documents(data: bytes) -> None:
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_collection(_split(data, 2)))
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_compressed_documents_are_detected_and_read(compression: str) -> None:
+    items = _items(20)
+    raw = io.BytesIO()
+    writer = CompressedWriter(raw, compression, level=1)
+    write_collection(writer, "Tea", items)
+    writer.finish()
+
+    data = raw.getvalue()
+    plain = json.dumps({"name": "Tea", "items": items}, indent=2).encode("utf-8")
+    assert b"".join(decompressed(_split(data, 5))) == plain
+
+    events = list(iter_collection(decompressed(_split(data, 5))))
+    assert [value for _, value in events] == ["Tea", *items]
+
+
+def test_plain_documents_pass_through_decompression() -> None:
+    data = json.dumps({"name": "x", "items": []}).encode()
+    assert b"".join(decompressed(_split(data, 2))) == data
+    assert list(decompressed([])) in ([], [b""])
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime
 from pathlib import Path
 from uuid import uuid4
 
+import pytest
+
 from domain import Collection, Item
+from storage.binary_storage import BinaryStorage
 from storage.json_storage import JsonStorage
-from storage.migrate import migrate_all
+from storage.migrate import (
+    MigrationPlan,
+    MigrationProgress,
+    content_digest,
+    migrate_all,
+    migrate_collections,
+    plan_migration,
+)
 from storage.sqlite_storage import SQLiteStorage
 
 
@@ -61,3 +75,171 @@ def test_migration_is_idempotent(tmp_path: Path) -> None:
 
     loaded = destination.load_collection("tea")
     assert _items_as_logical_set(loaded) == {("Da Hong Pao", "Oolong", 3)}
+
+
+def test_plan_migration_accounting() -> None:
+    plan = plan_migration(
+        ["Cigars", "Tea", "Whisky"],
+        ["tea"],
+        requested=["cigars", "CIGARS", "Tea", "Coffee", "Whisky"],
+    )
+    assert plan == MigrationPlan(migrate=["cigars", "Whisky"], skipped=1, missing=["Coffee"])
+
+    plan = plan_migration(["Cigars", "Tea"], ["tea"], overwrite=True)
+    assert plan == MigrationPlan(migrate=["Cigars", "Tea"])
+
+
+class _SlowSource:
+    def __init__(self, collections: list[Collection]) -> None:
+        self._collections = {c.name: c for c in collections}
+        self.threads: set[str] = set()
+
+    def list_collections(self) -> list[str]:
+        return list(self._collections)
+
+    def load_collection(self, name: str) -> Collection:
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.005)
+        return self._collections[name]
+
+    def save_collection(self, collection: Collection) -> None:
+        raise AssertionError("read only")
+
+
+def test_parallel_migration_batches_into_sqlite_transactions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    collections = [
+        Collection(
+            name=f"Collection {n:03d}",
+            items=[
+                Item(id=uuid4(), name=f"Item {i}", category="Misc", quantity=1) for i in range(n)
+            ],
+        )
+        for n in range(150)
+    ]
+    source = _SlowSource(collections)
+    destination = SQLiteStorage(tmp_path / "curation.db")
+
+    batches: list[int] = []
+    save_collections = destination.save_collections
+
+    def recording(batch: Iterable[Collection]) -> None:
+        batch = list(batch)
+        batches.append(len(batch))
+        save_collections(batch)
+
+    monkeypatch.setattr(destination, "save_collections", recording)
+
+    names = [c.name for c in collections]
+    assert migrate_collections(source, destination, names, jobs=4) == 150
+
+    assert len(source.threads) > 1
+    assert sum(batches) == 150
+    assert len(batches) < 150
+    assert list(destination.list_collections()) == names
+    for collection in collections[::37]:
+        loaded = destination.load_collection(collection.name)
+        assert _items_as_logical_set(loaded) == _items_as_logical_set(collection)
+
+
+def test_migration_falls_back_to_single_saves(tmp_path: Path) -> None:
+    source = SQLiteStorage(tmp_path / "curation.db")
+    for name in ("Cigars", "Tea"):
+        source.save_collection(
+            Collection(name=name, items=[Item(id=uuid4(), name="x", category="y", quantity=1)])
+        )
+    destination = JsonStorage(tmp_path / "json")
+
+    assert migrate_all(source, destination, jobs=2) == 2
+    assert list(destination.list_collections()) == ["Cigars", "Tea"]
+
+
+def test_content_digest_ignores_order_case_and_ids() -> None:
+    a = Collection(
+        name="Tea",
+        items=[
+            Item(id=uuid4(), name="Sencha", category="Green", quantity=2),
+            Item(id=uuid4(), name="Assam", category="Black", quantity=1),
+        ],
+    )
+    b = Collection(
+        name="tea",
+        items=[
+            Item(id=uuid4(), name="assam ", category="BLACK", quantity=1),
+            Item(id=uuid4(), name="Sencha", category="green", quantity=2),
+        ],
+    )
+    assert content_digest(a) == content_digest(b)
+
+    b.items[0].quantity = 3
+    assert content_digest(a) != content_digest(b)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_resume_skips_checkpointed_collections(tmp_path: Path, backend: str) -> None:
+    source = SQLiteStorage(tmp_path / "source.db")
+    names = [f"C{n}" for n in range(5)]
+    for name in names:
+        source.save_collection(
+            Collection(name=name, items=[Item(id=uuid4(), name="x", category="y", quantity=1)])
+        )
+
+    def destination() -> SQLiteStorage | JsonStorage:
+        if backend == "sqlite":
+            return SQLiteStorage(tmp_path / "destination.db")
+        return JsonStorage(tmp_path / "json")
+
+    # an interrupted run that got through the first three
+    assert migrate_collections(source, destination(), names[:3], jobs=1) == 3
+
+    changed = source.load_collection("C1")
+    changed.update_quantity(changed.items[0], 7, datetime.now())
+    source.save_collection(changed)
+
+    reports: list[MigrationProgress] = []
+    written = migrate_collections(
+        source, destination(), names, jobs=2, resume=True, progress=reports.append
+    )
+
+    assert written == 3  # C1 (changed since), C3, C4
+    assert reports[-1].collections == 5
+    assert reports[-1].resumed == 2
+    assert reports[-1].items == 5
+    assert reports[-1].eta == 0
+    assert destination().load_collection("C1").items[0].quantity == 7
+    assert list(destination().list_collections()) == names
+
+
+def test_backends_sharing_a_directory_keep_separate_checkpoints(tmp_path: Path) -> None:
+    source = SQLiteStorage(tmp_path / "source.db")
+    source.save_collection(
+        Collection(name="Tea", items=[Item(id=uuid4(), name="x", category="y", quantity=1)])
+    )
+    shared = tmp_path / "shared"
+
+    assert migrate_collections(source, BinaryStorage(shared), ["Tea"]) == 1
+    assert migrate_collections(source, JsonStorage(shared), ["Tea"], resume=True) == 1
+    assert list(JsonStorage(shared).list_collections()) == ["Tea"]
+    assert list(BinaryStorage(shared).list_collections()) == ["Tea"]
+
+
+def test_resume_rewrites_checkpointed_collections_the_destination_lost(tmp_path: Path) -> None:
+    source = SQLiteStorage(tmp_path / "source.db")
+    source.save_collection(Collection(name="Tea"))
+    destination = JsonStorage(tmp_path / "json")
+    assert migrate_collections(source, destination, ["Tea"]) == 1
+
+    (tmp_path / "json" / "tea.json").unlink()
+    assert migrate_collections(source, destination, ["Tea"], resume=True) == 1
+    assert list(destination.list_collections()) == ["Tea"]
+
+
+def test_without_resume_everything_is_rewritten(tmp_path: Path) -> None:
+    source = JsonStorage(tmp_path / "json")
+    source.save_collection(Collection(name="Tea"))
+    destination = SQLiteStorage(tmp_path / "curation.db")
+
+    assert migrate_all(source, destination) == 1
+    assert migrate_all(source, destination) == 1
+    assert set(destination.load_checkpoints()) == {"tea"}
@@ -1,7 +1,7 @@
 import sqlite3
 from pathlib import Path
 
-from storage.sqlite_storage import connect, init_database
+from storage.sqlite_storage import SCHEMA_VERSION, connect, init_database
 
 
 def table_names(conn: sqlite3.Connection) -> set[str]:
@@ -152,3 +152,20 @@ def test_unique_logical_item_per_collection(tmp_path: Path) -> None:
             pass
     finally:
         conn.close()
+
+
+def test_init_database_runs_once_per_schema_version(tmp_path: Path) -> None:
+    database_path = tmp_path / "test.db"
+    conn = connect(database_path)
+
+    try:
+        init_database(conn)
+        assert conn.execute("PRAGMA user_version;").fetchone()[0] == SCHEMA_VERSION
+
+        # a second call must not run the DDL again
+        conn.execute("DROP INDEX idx_items_category;")
+        init_database(conn)
+        indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index';")}
+        assert "idx_items_category" not in indexes
+    finally:
+        conn.close()
@@ -1,9 +1,20 @@
+import copy
+import dataclasses
+import pickle
+import random
+import threading
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 from uuid import uuid4
 
+import pytest
+
 from domain import Collection, Item
-from storage.sqlite_storage import SQLiteStorage, connect, init_database
+from services import CollectionService
+from storage import sqlite_storage
+from storage.base import ItemStorage
+from storage.sqlite_storage import SQLiteStorage, connect, has_fts_index, init_database
 
 
 def test_list_collections_empty(tmp_path: Path) -> None:
@@ -204,3 +215,347 @@ def test_multiple_collections_in_one_database(tmp_path: Path) -> None:
 
     assert [i.name for i in loaded_cigars.items] == ["Padron 1964"]
     assert [i.name for i in loaded_tea.items] == ["Da Hong Pao"]
+
+
+def test_save_after_load_writes_only_changed_items(tmp_path: Path) -> None:
+    database = tmp_path / "curation.db"
+    storage = SQLiteStorage(database)
+    service = CollectionService(storage)
+
+    storage.save_collection(
+        Collection(
+            name="Cigars",
+            items=[
+                Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2),
+                Item(id=uuid4(), name="Trinidad", category="Cigar", quantity=1),
+                Item(id=uuid4(), name="Oliva", category="Cigar", quantity=4),
+            ],
+        )
+    )
+
+    collection = service.load("Cigars")
+
+    # change a row behind the loaded collection's back; a delta save must not touch it
+    conn = connect(database)
+    try:
+        conn.execute("UPDATE items SET quantity = 9 WHERE name_norm = 'trinidad';")
+        conn.commit()
+    finally:
+        conn.close()
+
+    service.add_item(collection, "Padron 1964", "Cigar", 1)
+    service.remove_item(collection, "Oliva", "Cigar", 4)
+    service.add_item(collection, "Arturo Fuente", "Cigar", 1)
+    service.save(collection)
+
+    loaded = storage.load_collection("cigars")
+    assert sorted((i.name, i.quantity) for i in loaded.items) == [
+        ("Arturo Fuente", 1),
+        ("Padron 1964", 3),
+        ("Trinidad", 9),
+    ]
+
+
+def test_collection_from_other_storage_is_saved_in_full(tmp_path: Path) -> None:
+    first = SQLiteStorage(tmp_path / "first.db")
+    second = SQLiteStorage(tmp_path / "second.db")
+
+    first.save_collection(
+        Collection(
+            name="Tea",
+            items=[Item(id=uuid4(), name="Da Hong Pao", category="Oolong", quantity=3)],
+        )
+    )
+
+    second.save_collection(first.load_collection("tea"))
+
+    assert [i.name for i in second.load_collection("tea").items] == ["Da Hong Pao"]
+
+
+def test_item_level_operations(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    item = Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2)
+
+    assert isinstance(storage, ItemStorage)
+    assert storage.get_item("Cigars", "padron 1964", "cigar") is None
+
+    storage.upsert_item("Cigars", item)
+    assert storage.get_item(" CIGARS ", "PADRON 1964", "cigar") == item
+    assert storage.list_collections() == ["Cigars"]
+
+    assert storage.adjust_quantity("cigars", "Padron 1964", "Cigar", 3) == 5
+    assert storage.adjust_quantity("cigars", "Padron 1964", "Cigar", -5) == 0
+    assert storage.adjust_quantity("cigars", "Padron 1964", "Cigar", 1) is None
+    assert storage.get_item("cigars", "Padron 1964", "Cigar") is None
+
+    storage.upsert_item("Cigars", item)
+    assert storage.delete_item("cigars", "padron 1964", "CIGAR") is True
+    assert storage.delete_item("cigars", "padron 1964", "CIGAR") is False
+
+
+def test_write_through_service_persists_each_edit(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    service = CollectionService(storage, write_through=True)
+
+    collection = service.load("Cigars")
+    service.add_item(collection, "Padron 1964", "Cigar", 2)
+    service.add_item(collection, "Trinidad", "Cigar", 1)
+    service.remove_item(collection, "Padron 1964", "Cigar", 1)
+    service.set_quantity(collection, "Trinidad", "Cigar", 0)
+
+    # no save() call: every edit is already in the database
+    loaded = storage.load_collection("cigars")
+    assert [(i.name, i.quantity) for i in loaded.items] == [("Padron 1964", 1)]
+
+
+def test_storage_reuses_one_connection_per_thread(tmp_path: Path) -> None:
+    with SQLiteStorage(tmp_path / "curation.db") as storage:
+        storage.save_collection(
+            Collection(
+                name="Tea",
+                items=[Item(id=uuid4(), name="Da Hong Pao", category="Oolong", quantity=1)],
+            )
+        )
+        assert storage._connection() is storage._connection()
+
+        seen: list[list[str]] = []
+        worker = threading.Thread(target=lambda: seen.append(list(storage.list_collections())))
+        worker.start()
+        worker.join()
+
+        assert seen == [["Tea"]]
+        assert len(storage._connections) == 2
+
+    assert storage._connections == []
+    # a closed storage reconnects lazily
+    assert storage.list_collections() == ["Tea"]
+    storage.close()
+
+
+def test_full_save_of_large_collection_stays_within_variable_limit(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    items = [Item(id=uuid4(), name=f"Item {n}", category="Bulk", quantity=1) for n in range(40_000)]
+    storage.save_collection(Collection(name="Bulk", items=items))
+
+    # a fresh Collection has no delta, so this exercises the staged-keys delete
+    storage.save_collection(Collection(name="Bulk", items=items[::2]))
+
+    loaded = storage.load_collection("bulk")
+    assert len(loaded.items) == 20_000
+    assert {i.name for i in loaded.items} == {i.name for i in items[::2]}
+
+
+def test_profile_sets_connection_pragmas(tmp_path: Path) -> None:
+    with SQLiteStorage(tmp_path / "curation.db", profile="balanced") as storage:
+        conn = storage._connection()
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store;").fetchone()[0] == 2  # MEMORY
+
+
+def test_unknown_profile_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        SQLiteStorage(tmp_path / "curation.db", profile="reckless")
+
+
+def test_search_in_storage_matches_in_memory_search(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    service = CollectionService(storage)
+    names = ["Padron 1964", "Padron X000", "Añejo 'Reserva'", 'Say "when"', "Oliva V", "Opus"]
+    collection = Collection(
+        name="Cigars",
+        items=[Item(id=uuid4(), name=n, category="Cigar", quantity=1) for n in names],
+    )
+    storage.save_collection(collection)
+
+    collection = service.load("cigars")
+    service.remove_item(collection, "Oliva V", "Cigar", 1)
+    service.add_item(collection, "Padrino", "Cigar", 2)
+    service.save(collection)
+
+    loaded = storage.load_collection("cigars")
+    for keyword in ("padr", "PADRON", "ñej", '"when"', "'res", "o", "pa", "zzz", "oliva"):
+        expected = [i.name for i in loaded.items if _norm(keyword) in _norm(i.name)]
+        assert [i.name for i in storage.search("Cigars", keyword)] == expected
+        assert [i.name for i in service.search("cigars", keyword)] == expected
+
+    assert len(storage.search("cigars", "padr", limit=2)) == 2
+    assert storage.search("tea", "padron") == []
+
+
+def test_schema_upgrade_indexes_existing_rows_for_search(tmp_path: Path) -> None:
+    database = tmp_path / "curation.db"
+    with SQLiteStorage(database) as storage:
+        storage.save_collection(
+            Collection(
+                name="Tea",
+                items=[Item(id=uuid4(), name="Da Hong Pao", category="Oolong", quantity=1)],
+            )
+        )
+
+    # roll the file back to a version-1 schema (no FTS table)
+    conn = connect(database)
+    try:
+        conn.executescript(
+            """
+            DROP TRIGGER items_fts_insert;
+            DROP TRIGGER items_fts_delete;
+            DROP TRIGGER items_fts_update;
+            DROP TABLE items_fts;
+            PRAGMA user_version = 1;
+            """
+        )
+    finally:
+        conn.close()
+
+    with SQLiteStorage(database) as storage:
+        assert [i.name for i in storage.search("tea", "hong")] == ["Da Hong Pao"]
+
+
+def test_search_without_trigram_tokenizer_scans(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sqlite_storage, "supports_trigram", lambda conn: False)
+    database = tmp_path / "curation.db"
+    with SQLiteStorage(database) as storage:
+        storage.save_collection(
+            Collection(
+                name="Tea",
+                items=[
+                    Item(id=uuid4(), name="Da Hong Pao", category="Oolong", quantity=1),
+                    Item(id=uuid4(), name="Longjing", category="Green", quantity=2),
+                ],
+            )
+        )
+        assert [i.name for i in storage.search("tea", "hong")] == ["Da Hong Pao"]
+        assert [i.name for i in storage.search("tea", "g")] == ["Longjing", "Da Hong Pao"]
+
+    conn = connect(database)
+    try:
+        assert not has_fts_index(conn)
+    finally:
+        conn.close()
+
+
+def _norm(s: str) -> str:
+    return s.strip().casefold()
+
+
+def test_summary_from_trigger_totals_matches_in_memory_counter(tmp_path: Path) -> None:
+    rng = random.Random(7)
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    service = CollectionService(storage, write_through=True)
+    categories = ["Cigar", "cigar", "Tea", "Oolong"]
+
+    collection = service.load("Mixed")
+    for step in range(300):
+        name = f"Item {rng.randint(0, 30)}"
+        category = rng.choice(categories)
+        action = rng.random()
+        if action < 0.5:
+            service.add_item(collection, name, category, rng.randint(1, 5))
+        elif action < 0.8:
+            service.remove_item(collection, name, category, rng.randint(1, 5))
+        else:
+            service.set_quantity(collection, name, category, rng.randint(0, 5))
+
+        if step % 50 == 0:
+            # whole-collection saves go through the bulk upsert/delete path
+            storage.save_collection(Collection(name="Mixed", items=list(collection.items)))
+
+    loaded = storage.load_collection("mixed")
+    counts: Counter[str] = Counter()
+    for item in loaded.items:
+        counts[item.category] += item.quantity
+
+    assert storage.summary_by_category("MIXED") == dict(counts)
+    assert service.summary_by_category("mixed") == dict(counts)
+    assert service.summary_by_category(loaded) == dict(counts)
+
+    storage.save_collection(Collection(name="Mixed", items=[]))
+    assert storage.summary_by_category("mixed") == {}
+
+
+def test_schema_upgrade_backfills_category_totals(tmp_path: Path) -> None:
+    database = tmp_path / "curation.db"
+    with SQLiteStorage(database) as storage:
+        storage.save_collection(
+            Collection(
+                name="Tea",
+                items=[
+                    Item(id=uuid4(), name="Da Hong Pao", category="Oolong", quantity=2),
+                    Item(id=uuid4(), name="Tie Guan Yin", category="Oolong", quantity=3),
+                ],
+            )
+        )
+
+    conn = connect(database)
+    try:
+        conn.executescript("DELETE FROM category_totals; PRAGMA user_version = 2;")
+    finally:
+        conn.close()
+
+    with SQLiteStorage(database) as storage:
+        assert storage.summary_by_category("tea") == {"Oolong": 5}
+
+
+def test_iter_items_streams_in_load_order_across_pages(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    rng = random.Random(14)
+    items = [
+        Item(
+            id=uuid4(),
+            name=f"Item {i:03d}",
+            category=rng.choice(["Cigar", "tea", "Whisky"]),
+            quantity=rng.randint(1, 5),
+        )
+        for i in range(57)
+    ]
+    storage.save_collection(Collection(name="mixed", items=items))
+
+    expected = storage.load_collection("mixed").items
+
+    assert list(storage.iter_items("mixed", page_size=10)) == expected
+    assert list(storage.iter_items("mixed", page_size=57)) == expected
+    assert storage.page_items("mixed", limit=5) == expected[:5]
+
+    last = expected[9]
+    after = (_norm(last.category), _norm(last.name))
+    assert storage.page_items("mixed", after=after, limit=10) == expected[10:20]
+    assert list(storage.iter_items("missing")) == []
+
+
+def test_direct_item_edits_are_saved(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    storage.save_collection(
+        Collection(
+            name="Tea",
+            items=[
+                Item(id=uuid4(), name="Sencha", category="Green", quantity=1),
+                Item(id=uuid4(), name="Assam", category="Black", quantity=1),
+            ],
+        )
+    )
+
+    collection = storage.load_collection("tea")
+    collection.items[0].quantity = 99
+    collection.items[1] = Item(id=uuid4(), name="Oolong", category="Blue", quantity=3)
+    expected = sorted((i.name, i.quantity) for i in collection.items)
+    storage.save_collection(collection)
+
+    loaded = storage.load_collection("tea")
+    assert sorted((i.name, i.quantity) for i in loaded.items) == expected
+    assert (collection.items[0].name, 99) in expected
+
+
+def test_loaded_collections_copy_and_pickle(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "curation.db")
+    item = Item(id=uuid4(), name="Sencha", category="Green", quantity=1)
+    storage.save_collection(Collection(name="Tea", items=[item]))
+    loaded = storage.load_collection("tea")
+
+    for copied in (copy.deepcopy(loaded), pickle.loads(pickle.dumps(loaded))):
+        assert copied == loaded and copied.items[0] is not loaded.items[0]
+        # a copy has no delta against the storage: saved in full
+        assert copied.changes_since_clean(storage) is None
+    assert dataclasses.asdict(loaded) == {"name": "Tea", "items": [item]}
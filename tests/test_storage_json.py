@@ -0,0 +1,464 @@
+import copy
+import dataclasses
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from domain import Collection, Item, item_key
+from services import CollectionService
+from storage import json_storage
+from storage.base import ItemStorage, SearchableStorage, StreamingStorage
+from storage.json_storage import JOURNAL_SUFFIX, MANIFEST_NAME, CacheInfo, JsonStorage
+
+
+def test_save_then_load_roundtrip(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    item = Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2)
+
+    storage.save_collection(Collection(name="Cigars", items=[item]))
+    loaded = storage.load_collection("Cigars")
+
+    assert loaded.name == "Cigars"
+    assert loaded.items == [item]
+
+
+def test_unchanged_collection_is_not_rewritten(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    service = CollectionService(storage)
+    storage.save_collection(
+        Collection(
+            name="Cigars",
+            items=[Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2)],
+        )
+    )
+
+    collection = storage.load_collection("Cigars")
+    path = tmp_path / "cigars.json"
+    path.write_text(path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    marker = path.read_text(encoding="utf-8")
+
+    service.save(collection)
+    assert path.read_text(encoding="utf-8") == marker
+
+    service.add_item(collection, "Padron 1964", "Cigar", 1)
+    service.save(collection)
+    assert storage.load_collection("Cigars").items[0].quantity == 3
+
+
+def test_item_level_fallback(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    item = Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2)
+
+    assert isinstance(storage, ItemStorage)
+
+    storage.upsert_item("Cigars", item)
+    assert storage.get_item("Cigars", "PADRON 1964", "cigar") == item
+    assert storage.adjust_quantity("Cigars", "padron 1964", "cigar", 1) == 3
+    assert storage.load_collection("Cigars").items[0].quantity == 3
+    assert storage.delete_item("Cigars", "padron 1964", "cigar") is True
+    assert storage.load_collection("Cigars").items == []
+
+
+def test_search_by_name_falls_back_to_loading(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    service = CollectionService(storage)
+    storage.save_collection(
+        Collection(
+            name="Cigars",
+            items=[
+                Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2),
+                Item(id=uuid4(), name="Oliva", category="Cigar", quantity=1),
+            ],
+        )
+    )
+
+    assert not isinstance(storage, SearchableStorage)
+    assert [i.name for i in service.search("Cigars", "padron")] == ["Padron 1964"]
+
+
+def test_files_are_named_by_normalized_name(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    legacy = tmp_path / "Cigars.json"
+    legacy.write_text('{"name": "Cigars", "items": []}', encoding="utf-8")
+
+    collection = CollectionService(storage).load("Cigars")
+    assert collection.name == "Cigars"
+
+    storage.save_collection(collection)
+
+    assert (tmp_path / "cigars.json").exists()
+    assert not legacy.exists()
+    assert list(storage.list_collections()) == ["Cigars"]
+
+
+def test_legacy_file_is_removed_whatever_its_case(tmp_path: Path) -> None:
+    legacy = tmp_path / "CIGARS.json"
+    legacy.write_text('{"name": "Cigars", "items": []}', encoding="utf-8")
+    storage = JsonStorage(tmp_path)
+
+    collection = storage.load_collection("cigars")
+    assert collection.name == "Cigars"
+    storage.save_collection(collection)
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == ["cigars.json"]
+    assert list(storage.list_collections()) == ["Cigars"]
+
+
+def test_missing_collections_do_not_rescan_the_data_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    globs: list[str] = []
+    original = Path.glob
+
+    def counting(self: Path, pattern: str) -> Any:
+        globs.append(pattern)
+        return original(self, pattern)
+
+    monkeypatch.setattr(Path, "glob", counting)
+
+    storage = JsonStorage(tmp_path)
+    (tmp_path / "Tea.json").write_text('{"name": "Tea", "items": []}', encoding="utf-8")
+    for n in range(20):
+        storage.save_collection(Collection(name=f"c{n}"))
+    for n in range(10):
+        assert storage.load_collection(f"missing {n}").items == []
+        assert list(storage.iter_items(f"missing {n}")) == []
+    assert storage.load_collection("tea").name == "Tea"
+
+    assert len(globs) == 1
+
+
+def test_service_iter_items_falls_back_to_load(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    item = Item(id=uuid4(), name="Padron 1964", category="Cigar", quantity=2)
+    storage.save_collection(Collection(name="Cigars", items=[item]))
+
+    assert list(CollectionService(storage).iter_items("Cigars")) == [item]
+
+
+def test_iter_items_streams_from_the_file(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    items = [
+        Item(id=uuid4(), name=f"Item {i}", category="Cigar", quantity=i + 1) for i in range(50)
+    ]
+    storage.save_collection(Collection(name="Cigars", items=items))
+
+    assert isinstance(storage, StreamingStorage)
+    assert list(storage.iter_items("cigars")) == items
+    assert list(storage.iter_items("missing")) == []
+
+
+def test_listing_uses_manifest_and_rescans_only_stale_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    storage = JsonStorage(tmp_path)
+    for name in ("Cigars", "Tea"):
+        item = Item(id=uuid4(), name="Thing", category="Misc", quantity=1)
+        storage.save_collection(Collection(name=name, items=[item]))
+
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert manifest["collections"]["cigars.json"]["items"] == 1
+    assert manifest["collections"]["tea.json"]["name_norm"] == "tea"
+
+    scanned: list[str] = []
+    real_scan = json_storage._scan_file
+
+    def counting_scan(path: Path) -> tuple[str | None, int]:
+        scanned.append(path.name)
+        return real_scan(path)
+
+    monkeypatch.setattr(json_storage, "_scan_file", counting_scan)
+
+    assert storage.list_collections() == ["Cigars", "Tea"]
+    assert scanned == []
+
+    # edited behind the storage's back: only that file is parsed again
+    path = tmp_path / "tea.json"
+    path.write_text(path.read_text(encoding="utf-8").replace('"Tea"', '"Green Tea"'))
+    assert storage.list_collections() == ["Cigars", "Green Tea"]
+    assert scanned == ["tea.json"]
+
+    # a lost manifest is rebuilt, and deleted files drop out of it
+    (tmp_path / MANIFEST_NAME).unlink()
+    (tmp_path / "cigars.json").unlink()
+    assert storage.list_collections() == ["Green Tea"]
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert list(manifest["collections"]) == ["tea.json"]
+
+
+def _cigars(count: int) -> Collection:
+    return Collection(
+        name="Cigars",
+        items=[
+            Item(id=uuid4(), name=f"Cigar {i}", category="Cigar", quantity=1) for i in range(count)
+        ],
+    )
+
+
+def test_journaled_save_appends_only_the_changes(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path, journal=True)
+    service = CollectionService(storage)
+    storage.save_collection(_cigars(200))
+    snapshot = (tmp_path / "cigars.json").read_bytes()
+
+    collection = storage.load_collection("Cigars")
+    service.add_item(collection, "Cigar 5", "Cigar", 2)
+    service.remove_item(collection, "Cigar 7", "Cigar", 1)
+    service.add_item(collection, "Padron 1964", "Cigar", 3)
+    service.save(collection)
+
+    journal = tmp_path / f"cigars{JOURNAL_SUFFIX}"
+    assert (tmp_path / "cigars.json").read_bytes() == snapshot
+    assert len(journal.read_bytes().splitlines()) == 1
+
+    reloaded = storage.load_collection("Cigars")
+    assert sorted(reloaded.items, key=item_key) == sorted(collection.items, key=item_key)
+    assert sorted(JsonStorage(tmp_path).iter_items("Cigars"), key=item_key) == sorted(
+        collection.items, key=item_key
+    )
+
+
+def test_journal_is_compacted_past_the_ratio(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path, journal=True, compact_ratio=0.05)
+    service = CollectionService(storage)
+    storage.save_collection(_cigars(100))
+    journal = tmp_path / f"cigars{JOURNAL_SUFFIX}"
+
+    collection = storage.load_collection("Cigars")
+    saves = 0
+    while not saves or journal.exists():
+        service.add_item(collection, f"Cigar {saves}", "Cigar", 1)
+        service.save(collection)
+        saves += 1
+
+    assert saves > 1
+    assert not journal.exists()
+    assert storage.load_collection("Cigars").items == collection.items
+
+
+def test_torn_journal_record_is_ignored_and_repaired(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path, journal=True)
+    service = CollectionService(storage)
+    storage.save_collection(_cigars(50))
+    journal = tmp_path / f"cigars{JOURNAL_SUFFIX}"
+
+    collection = storage.load_collection("Cigars")
+    service.set_quantity(collection, "Cigar 1", "Cigar", 9)
+    service.save(collection)
+    with journal.open("ab") as f:
+        f.write(b'{"deletes":[["cigar 2","ci')
+
+    collection = storage.load_collection("Cigars")
+    assert collection.find("cigar 1", "cigar").quantity == 9
+    assert collection.find("cigar 2", "cigar") is not None
+
+    service.set_quantity(collection, "Cigar 3", "Cigar", 4)
+    service.save(collection)
+    assert len(journal.read_bytes().splitlines()) == 2
+
+    # a storage without journaling still replays, then folds the log away
+    plain = JsonStorage(tmp_path)
+    collection = plain.load_collection("Cigars")
+    assert collection.find("cigar 3", "cigar").quantity == 4
+    CollectionService(plain).add_item(collection, "Cigar 4", "Cigar", 1)
+    plain.save_collection(collection)
+    assert not journal.exists()
+    assert plain.load_collection("Cigars").find("cigar 4", "cigar").quantity == 2
+
+
+def test_crash_during_compaction_does_not_replay_the_folded_journal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    storage = JsonStorage(tmp_path, journal=True, compact_ratio=100)
+    service = CollectionService(storage)
+    storage.save_collection(
+        Collection(
+            name="Tea",
+            items=[
+                Item(id=uuid4(), name="Tea 1", category="Tea", quantity=1),
+                Item(id=uuid4(), name="Tea 2", category="Tea", quantity=1),
+            ],
+        )
+    )
+    journal = tmp_path / f"tea{JOURNAL_SUFFIX}"
+
+    collection = storage.load_collection("Tea")
+    service.remove_item(collection, "Tea 1", "Tea", 1)
+    service.set_quantity(collection, "Tea 2", "Tea", 9)
+    service.save(collection)  # journaled
+    assert journal.exists()
+
+    class Crash(Exception):
+        pass
+
+    real_replace = os.replace
+
+    def replace_then_crash(src: Any, dst: Any) -> None:
+        real_replace(src, dst)
+        if str(dst).endswith("tea.json"):
+            raise Crash  # before the journal is unlinked
+
+    service.add_item(collection, "Tea 1", "Tea", 7)
+    service.set_quantity(collection, "Tea 2", "Tea", 3)
+    monkeypatch.setattr(os, "replace", replace_then_crash)
+    with pytest.raises(Crash):
+        JsonStorage(tmp_path).save_collection(collection)  # compacts
+    monkeypatch.undo()
+    assert journal.exists()
+
+    def quantities(collection: Collection) -> dict[str, int]:
+        return {item.name: item.quantity for item in collection.items}
+
+    reloaded = JsonStorage(tmp_path, journal=True, compact_ratio=100).load_collection("Tea")
+    assert quantities(reloaded) == {"Tea 1": 7, "Tea 2": 3}
+
+    # the next journaled save starts a fresh journal instead of extending it
+    storage = JsonStorage(tmp_path, journal=True, compact_ratio=100)
+    collection = storage.load_collection("Tea")
+    CollectionService(storage).set_quantity(collection, "Tea 2", "Tea", 4)
+    storage.save_collection(collection)
+    assert len(journal.read_bytes().splitlines()) == 1
+    assert quantities(JsonStorage(tmp_path).load_collection("Tea")) == {"Tea 1": 7, "Tea 2": 4}
+
+
+def test_unknown_durability_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        JsonStorage(tmp_path, durability="paranoid")
+
+
+@pytest.mark.parametrize(
+    ("durability", "expected_syncs"),
+    [("none", 0), ("file", 10), ("file+dir", 11), ("group", 2)],
+)
+def test_durability_levels_control_fsyncs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, durability: str, expected_syncs: int
+) -> None:
+    storage = JsonStorage(tmp_path, journal=True, durability=durability, group_window=60)
+    service = CollectionService(storage)
+    storage.save_collection(_cigars(1000))
+    storage.flush()
+    collection = storage.load_collection("Cigars")
+
+    syncs: list[int] = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: syncs.append(fd) or real_fsync(fd))
+
+    # ten journaled saves; the first one creates the journal file
+    for n in range(10):
+        service.add_item(collection, f"Cigar {n}", "Cigar", 1)
+        service.save(collection)
+    storage.close()
+
+    assert len(syncs) == expected_syncs
+    assert storage.load_collection("Cigars").items == collection.items
+
+
+@pytest.mark.parametrize("compression", ["gzip", "lzma", "zlib"])
+def test_compressed_files_coexist_with_plain_ones(tmp_path: Path, compression: str) -> None:
+    cigars = _cigars(3)
+    JsonStorage(tmp_path).save_collection(cigars)
+    JsonStorage(tmp_path / "plain").save_collection(
+        Collection(name="Tea", items=_cigars(300).items)
+    )
+
+    storage = JsonStorage(tmp_path, compression=compression, compression_level=1)
+    tea = JsonStorage(tmp_path / "plain").load_collection("Tea")
+    storage.save_collection(Collection(name="Tea", items=tea.items))
+
+    compressed = (tmp_path / "tea.json").read_bytes()
+    assert len(compressed) * 5 < (tmp_path / "plain" / "tea.json").stat().st_size
+
+    plain = JsonStorage(tmp_path)
+    assert plain.list_collections() == ["Cigars", "Tea"]
+    assert plain.load_collection("Tea").items == tea.items
+    assert list(plain.iter_items("Tea")) == tea.items
+    assert storage.load_collection("Cigars").items == cigars.items
+
+
+def test_unknown_compression_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        JsonStorage(tmp_path, compression="zip")
+    with pytest.raises(ValueError):
+        JsonStorage(tmp_path, compression="gzip", compression_level=12)
+
+
+def test_read_cache_hits_until_the_file_changes(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path, cache_size=2)
+    JsonStorage(tmp_path).save_collection(_cigars(20))
+
+    first = storage.load_collection("Cigars")
+    second = storage.load_collection("Cigars")
+    assert storage.cache_info() == CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+    assert second.items == first.items
+
+    # callers get their own copies
+    second.items[0].quantity = 99
+    CollectionService(storage).add_item(second, "Cigar 1", "Cigar", 5)
+    assert storage.load_collection("Cigars").items == first.items
+
+    # changed on disk by someone else: parsed again
+    other = JsonStorage(tmp_path).load_collection("Cigars")
+    CollectionService(JsonStorage(tmp_path)).add_item(other, "Padron 1964", "Cigar", 100)
+    JsonStorage(tmp_path).save_collection(other)
+    assert storage.load_collection("Cigars").items == other.items
+    assert storage.cache_info().misses == 2
+
+
+def test_read_cache_evicts_least_recently_used_and_learns_from_saves(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path, cache_size=2, journal=True)
+    for name in ("a", "b", "c"):
+        storage.save_collection(Collection(name=name, items=_cigars(3).items))
+    assert storage.cache_info().currsize == 2
+
+    storage.load_collection("b")
+    storage.load_collection("c")
+    storage.load_collection("a")
+    assert storage.cache_info()[:2] == (2, 1)
+
+    collection = storage.load_collection("b")  # "b" was evicted by "a"
+    CollectionService(storage).add_item(collection, "New", "Cigar", 1)
+    storage.save_collection(collection)  # journaled
+    assert storage.load_collection("b").items == collection.items
+    assert storage.cache_info()[:2] == (3, 2)
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_direct_item_edits_are_saved(tmp_path: Path, journal: bool) -> None:
+    storage = JsonStorage(tmp_path, journal=journal)
+    storage.save_collection(
+        Collection(
+            name="Tea",
+            items=[
+                Item(id=uuid4(), name="Sencha", category="Green", quantity=1),
+                Item(id=uuid4(), name="Assam", category="Black", quantity=1),
+            ],
+        )
+    )
+
+    collection = storage.load_collection("tea")
+    collection.items[0].quantity = 99
+    collection.items[1] = Item(id=uuid4(), name="Oolong", category="Blue", quantity=3)
+    expected = sorted((i.name, i.quantity) for i in collection.items)
+    storage.save_collection(collection)
+
+    loaded = storage.load_collection("tea")
+    assert sorted((i.name, i.quantity) for i in loaded.items) == expected
+    assert (collection.items[0].name, 99) in expected
+
+
+def test_loaded_collections_copy_and_pickle(tmp_path: Path) -> None:
+    storage = JsonStorage(tmp_path)
+    item = Item(id=uuid4(), name="Sencha", category="Green", quantity=1)
+    storage.save_collection(Collection(name="Tea", items=[item]))
+    loaded = storage.load_collection("tea")
+
+    for copied in (copy.deepcopy(loaded), pickle.loads(pickle.dumps(loaded))):
+        assert copied == loaded and copied.items[0] is not loaded.items[0]
+        # a copy has no delta against the storage: saved in full
+        assert copied.changes_since_clean(storage) is None
+    assert dataclasses.asdict(loaded) == {"name": "Tea", "items": [item]}
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from domain import Collection, Item
+from storage.binary_storage import BinaryStorage
+from storage.json_storage import JsonStorage
+from storage.sqlite_storage import SQLiteStorage
+from storage.sync import fingerprint, plan_sync, sync_collections
+
+
+def _item(name: str, quantity: int = 1, category: str = "Misc") -> Item:
+    return Item(id=uuid4(), name=name, category=category, quantity=quantity)
+
+
+def _logical(collection: Collection) -> set[tuple[str, str, int]]:
+    return {(i.name, i.category, i.quantity) for i in collection.items}
+
+
+def test_fingerprint_ignores_order_and_case_but_not_quantity_or_duplicates() -> None:
+    items = [_item("Sencha", 2, "Green"), _item("Assam", 1, "Black")]
+    same = [_item("assam", 1, "BLACK"), _item(" Sencha", 2, "green")]
+
+    assert fingerprint(items) == fingerprint(same)
+    assert fingerprint(items).items == 2
+    assert fingerprint(items) != fingerprint([*items, _item("Assam", 1, "Black")])
+    assert fingerprint(items) != fingerprint([_item("Sencha", 3, "Green"), items[1]])
+    assert fingerprint([]) == fingerprint(iter([]))
+
+
+def test_plan_sync_finds_only_differing_collections(tmp_path: Path) -> None:
+    source = JsonStorage(tmp_path / "json")
+    destination = SQLiteStorage(tmp_path / "curation.db")
+    for name, items in (("Cigars", ["Padron"]), ("Tea", ["Sencha", "Assam"]), ("Empty", [])):
+        collection = Collection(name=name, items=[_item(n) for n in items])
+        source.save_collection(collection)
+        if name != "Cigars":
+            destination.save_collection(collection)
+
+    plan = plan_sync(source, destination, jobs=2)
+    assert plan.changed == ["Cigars"]
+    assert sorted(plan.unchanged) == ["Empty", "Tea"]
+
+    assert plan_sync(source, destination, names=["tea", "TEA"]).unchanged == ["tea"]
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json-journal", "binary"])
+def test_sync_transfers_only_differing_items(tmp_path: Path, backend: str) -> None:
+    source = SQLiteStorage(tmp_path / "source.db")
+    destination: SQLiteStorage | JsonStorage | BinaryStorage
+    if backend == "sqlite":
+        destination = SQLiteStorage(tmp_path / "destination.db")
+    elif backend == "binary":
+        destination = BinaryStorage(tmp_path / "binary")
+    else:
+        destination = JsonStorage(tmp_path / "json", journal=True)
+
+    original = Collection(name="Tea", items=[_item(f"Tea {n}") for n in range(20)])
+    source.save_collection(original)
+    destination.save_collection(original)
+    kept_id = destination.load_collection("Tea").items[5].id
+
+    edited = source.load_collection("Tea")
+    edited.update_quantity(edited.items[0], 9, datetime.utcnow())
+    edited.remove(edited.find("tea 1", "misc"))  # type: ignore[arg-type]
+    edited.append(_item("Matcha"))
+    source.save_collection(edited)
+
+    assert plan_sync(source, destination).changed == ["Tea"]
+    result = sync_collections(source, destination, ["Tea"])
+
+    assert (result.collections, result.upserted, result.deleted) == (1, 2, 1)
+    synced = destination.load_collection("Tea")
+    assert _logical(synced) == _logical(source.load_collection("Tea"))
+    assert any(item.id == kept_id for item in synced.items)
+    assert plan_sync(source, destination).changed == []
+
+
+def test_sync_creates_missing_collections(tmp_path: Path) -> None:
+    source = JsonStorage(tmp_path / "json")
+    source.save_collection(Collection(name="Cigars", items=[_item("Padron", 2)]))
+    destination = SQLiteStorage(tmp_path / "curation.db")
+
+    result = sync_collections(source, destination, plan_sync(source, destination).changed)
+
+    assert result.upserted == 1
+    assert list(destination.list_collections()) == ["Cigars"]
+    assert _logical(destination.load_collection("Cigars")) == {("Padron", "Misc", 2)}